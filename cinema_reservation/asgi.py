@@ -1,3 +1,6 @@
+# ASGI entry point. Serve the site through this (e.g. `uvicorn cinema_reservation.asgi:application`) to get live
+# seat updates: the seat event stream is an async view and would tie up a worker under WSGI. Checkout and
+# payment verification are async as well, so under ASGI waiting on Chapa does not block anything else.
 import os
 
 from django.core.asgi import get_asgi_application
@@ -5,3 +8,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinema_reservation.settings')
 
 application = get_asgi_application()
+
+# this process has one long-lived event loop, so Chapa calls from async views can share one AsyncClient
+from cinema_reservation.chapa import chapa  # noqa: E402
+chapa.use_async_client = True
+
+# load the search box titles now instead of on the first keystroke
+from search import typeahead  # noqa: E402
+typeahead.warm()
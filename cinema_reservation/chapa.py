@@ -0,0 +1,261 @@
+# our Chapa client is the one place both apps talk to the payment gateway through.
+# It keeps a pooled keep-alive session (no new TLS handshake per call), gives every call a timeout, retries the
+# idempotent verify call with jittered backoff, and trips a circuit breaker when Chapa keeps failing so that
+# checkouts fail fast instead of every worker waiting on a dead gateway.
+#
+# The async views use the same client through ainitialize_payment / averify_payment. Under asgi.py those are
+# backed by an httpx.AsyncClient, so one process can keep many Chapa calls in flight without a thread each;
+# under WSGI every async view runs on a throwaway event loop, so they go through the pooled sync session instead.
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+class ChapaError(Exception):
+    pass
+
+
+class ChapaTimeout(ChapaError):
+    pass
+
+
+class ChapaUnavailable(ChapaError):
+    # raised without calling Chapa while the circuit breaker is open
+    pass
+
+
+class ChapaRejected(ChapaError):
+    # Chapa refused the call itself (bad key, forbidden), asking again won't help
+    pass
+
+
+# verify answers that say something about the payment: found (200) or not found / invalid tx_ref (400, 404).
+# Anything else, e.g. a 401 or a 429 "Too Many Requests" body with status "failed", is about the call.
+VERIFY_ANSWERS = (200, 400, 404)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for `reset_timeout` seconds.
+    After that a single trial call is let through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+
+class ChapaClient:
+    def __init__(self):
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._local = threading.local()
+        # set by asgi.py, whose event loop lives as long as the process
+        self.use_async_client = False
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.CHAPA_CIRCUIT_FAILURES,
+            reset_timeout=settings.CHAPA_CIRCUIT_RESET_SECONDS,
+        )
+
+    @property
+    def session(self):
+        # one session per process, its connection pool is shared by all worker threads
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.CHAPA_POOL_SIZE)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    @property
+    def async_session(self):
+        # an AsyncClient belongs to the event loop it was first used on. Under ASGI that loop lives as long as
+        # the process, so the client and its pool are made once.
+        loop = asyncio.get_running_loop()
+        if getattr(self._local, 'loop', None) is not loop:
+            self._local.loop = loop
+            self._local.client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=settings.CHAPA_ASYNC_POOL_SIZE,
+                max_keepalive_connections=settings.CHAPA_POOL_SIZE,
+            ))
+        return self._local.client
+
+    def _headers(self):
+        return {"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
+
+    def _send(self, method, url, timeout, **kwargs):
+        if not self.breaker.allow():
+            raise ChapaUnavailable("Chapa is not responding, try again shortly.")
+        try:
+            response = self.session.request(method, url, headers=self._headers(), timeout=timeout, **kwargs)
+        except requests.exceptions.Timeout as e:
+            self.breaker.record_failure()
+            raise ChapaTimeout(str(e)) from e
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            raise ChapaError(str(e)) from e
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            raise ChapaError(f"Chapa returned {response.status_code}")
+        self.breaker.record_success()
+
+        try:
+            return response.status_code, response.json()
+        except ValueError as e:
+            raise ChapaError(f"Invalid response from Chapa: {response.text[:200]}") from e
+
+    async def _asend(self, method, url, timeout, **kwargs):
+        # async twin of _send, sharing the same circuit breaker
+        if not self.breaker.allow():
+            raise ChapaUnavailable("Chapa is not responding, try again shortly.")
+        connect_timeout, read_timeout = timeout
+        try:
+            response = await self.async_session.request(
+                method, url, headers=self._headers(),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout), **kwargs
+            )
+        except httpx.TimeoutException as e:
+            self.breaker.record_failure()
+            raise ChapaTimeout(str(e)) from e
+        except httpx.HTTPError as e:
+            self.breaker.record_failure()
+            raise ChapaError(str(e)) from e
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            raise ChapaError(f"Chapa returned {response.status_code}")
+        self.breaker.record_success()
+
+        try:
+            return response.status_code, response.json()
+        except ValueError as e:
+            raise ChapaError(f"Invalid response from Chapa: {response.text[:200]}") from e
+
+    def initialize(self, payload):
+        """
+        Start a payment and return Chapa's response data (with data.checkout_url).
+        Never retried: a second initialize could create a second charge.
+        """
+        status_code, data = self._send(
+            'POST', settings.CHAPA_BASE_URL, settings.CHAPA_TIMEOUTS['initialize'], json=payload
+        )
+        if status_code != 200 or data.get('status') != 'success':
+            raise ChapaError(data.get('message') or str(data))
+        return data
+
+    def verify_answer(self, status_code, data):
+        if status_code == 429:
+            raise ChapaError("Chapa is rate limiting verify calls")
+        if status_code not in VERIFY_ANSWERS or not isinstance(data, dict):
+            raise ChapaRejected(f"Chapa refused to verify ({status_code}): {str(data)[:200]}")
+        return data
+
+    def verify(self, tx_ref):
+        # verify is idempotent, so transport errors, 5xx and 429 are retried with exponential backoff and full jitter
+        attempts = settings.CHAPA_VERIFY_RETRIES + 1
+        for attempt in range(attempts):
+            try:
+                status_code, data = self._send(
+                    'GET', f"{settings.CHAPA_VERIFY_URL}{tx_ref}", settings.CHAPA_TIMEOUTS['verify']
+                )
+                return self.verify_answer(status_code, data)
+            except (ChapaUnavailable, ChapaRejected):
+                raise
+            except ChapaError:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(random.uniform(0, settings.CHAPA_RETRY_BACKOFF * (2 ** attempt)))
+
+    async def ainitialize(self, payload):
+        if not self.use_async_client:
+            return await sync_to_async(self.initialize)(payload)
+        status_code, data = await self._asend(
+            'POST', settings.CHAPA_BASE_URL, settings.CHAPA_TIMEOUTS['initialize'], json=payload
+        )
+        if status_code != 200 or data.get('status') != 'success':
+            raise ChapaError(data.get('message') or str(data))
+        return data
+
+    async def averify(self, tx_ref):
+        if not self.use_async_client:
+            return await sync_to_async(self.verify)(tx_ref)
+        attempts = settings.CHAPA_VERIFY_RETRIES + 1
+        for attempt in range(attempts):
+            try:
+                status_code, data = await self._asend(
+                    'GET', f"{settings.CHAPA_VERIFY_URL}{tx_ref}", settings.CHAPA_TIMEOUTS['verify']
+                )
+                return self.verify_answer(status_code, data)
+            except (ChapaUnavailable, ChapaRejected):
+                raise
+            except ChapaError:
+                if attempt == attempts - 1:
+                    raise
+                await asyncio.sleep(random.uniform(0, settings.CHAPA_RETRY_BACKOFF * (2 ** attempt)))
+
+
+chapa = ChapaClient()
+
+
+def initialize_payment(payload):
+    return chapa.initialize(payload)
+
+
+def verify_payment(tx_ref):
+    return chapa.verify(tx_ref)
+
+
+async def ainitialize_payment(payload):
+    return await chapa.ainitialize(payload)
+
+
+async def averify_payment(tx_ref):
+    return await chapa.averify(tx_ref)
+
+
+def is_verified(result):
+    # Chapa reports both the API call status and the transaction status
+    data = result.get("data")
+    return result.get("status") == "success" and isinstance(data, dict) and data.get("status") == "success"
@@ -3,7 +3,7 @@ from django.contrib import admin
 from django.db.models import Sum, Count, F, Avg
 from django.utils.html import format_html
 from django.http import HttpResponse
-from django.urls import path
+from django.urls import path, reverse
 from django.shortcuts import render
 from django.utils.translation import gettext_lazy as _
 import csv
@@ -173,8 +173,8 @@ class StreamingSubscriptionAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
     def qr_preview(self, obj):
-        if obj.qr_code:
-            return format_html('<img src="{}" width="150" height="150" />', obj.qr_code.url)
+        if obj.is_paid:
+            return format_html('<img src="{}" width="150" height="150" />', reverse('streaming:subscription_qr', args=[obj.chapa_tx_ref]))
         return _("No QR code")
     qr_preview.short_description = _("QR Code")
 
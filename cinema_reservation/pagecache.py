@@ -0,0 +1,62 @@
+# our page cache for the most-hit anonymous pages (home, cinema, about). A cached page's key holds the language,
+# the full URL and the current "generation" of every kind of data the page shows ('movies', 'streaming', 'seats').
+# Saving or deleting a show or streaming title, or any seat change, gives its group a new generation, so exactly
+# the pages showing that data are missed and re-rendered; stale ones simply expire. A hit costs two cache reads
+# and no database query.
+# Use a cache shared by all processes in production (REDIS_URL), otherwise each process only sees its own
+# invalidations.
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_KEY = 'pagecache:generation:%s'
+
+
+def generations(groups):
+    keys = [GENERATION_KEY % group for group in groups]
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        # a generation that fell out of the cache gets a fresh value, never an old one that may still have pages
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def invalidate(*groups):
+    cache.set_many({GENERATION_KEY % group: uuid.uuid4().hex for group in groups}, None)
+
+
+def cacheable(request):
+    # anonymous visitors only: with a session there may be messages, a logged-in header, a CSRF form...
+    return request.method in ('GET', 'HEAD') and settings.SESSION_COOKIE_NAME not in request.COOKIES
+
+
+def page_key(request, groups):
+    language = f"{getattr(request, 'LANGUAGE_CODE', '')}:{getattr(request, 'lang_code', '')}"
+    url = hashlib.sha256(request.get_full_path().encode()).hexdigest()[:32]
+    return f"pagecache:page:{language}:{url}:{':'.join(generations(groups))}"
+
+
+def cached_page(*groups, timeout=None):
+    """
+    Cache a view's page for anonymous visitors until one of groups is invalidated
+    (or timeout seconds, PAGE_CACHE_SECONDS by default).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not cacheable(request):
+                return view(request, *args, **kwargs)
+            key = page_key(request, groups)
+            response = cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not response.streaming and not response.cookies:
+                    cache.set(key, response, settings.PAGE_CACHE_SECONDS if timeout is None else timeout)
+            return response
+        return wrapper
+    return decorator
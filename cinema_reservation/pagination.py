@@ -0,0 +1,83 @@
+# our keyset (cursor) pagination for the catalog listings. Instead of OFFSET, a page continues after the last row
+# of the previous one: WHERE (show_time, id) > (last show_time, last id) ORDER BY show_time, id LIMIT n. With an
+# index on the ordering columns every page is one bounded range scan, however many shows exist.
+# The cursor handed to the client is the last row's ordering values, JSON in url-safe base64.
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+PAGE_SIZE = 24
+
+
+class BadCursor(Exception):
+    pass
+
+
+def to_json(value):
+    # full precision: DjangoJSONEncoder cuts datetimes to milliseconds, which would repeat or skip rows
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=to_json, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode('ascii').rstrip('=')
+
+
+def load_cursor(cursor, length):
+    # the raw JSON values of a cursor, checked to be a list of the expected length
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise BadCursor(cursor)
+    if not isinstance(values, list) or len(values) != length:
+        raise BadCursor(cursor)
+    return values
+
+
+def decode_cursor(queryset, ordering, cursor):
+    values = load_cursor(cursor, len(ordering))
+    decoded = []
+    for field, value in zip(ordering, values):
+        # we never hand out NULLs (the ordering columns are not nullable), and only plain JSON scalars
+        if value is None or not isinstance(value, (str, int, float)):
+            raise BadCursor(cursor)
+        try:
+            value = queryset.model._meta.get_field(field.lstrip('-')).to_python(value)
+        except FieldDoesNotExist:
+            pass  # an annotation (e.g. a count), JSON already has the right type
+        except (ValidationError, TypeError, ValueError):
+            raise BadCursor(cursor)
+        if value is None:
+            raise BadCursor(cursor)
+        decoded.append(value)
+    return decoded
+
+
+def after(ordering, values):
+    # (a, b, c) > (x, y, z)  ==  a > x  OR  (a = x AND b > y)  OR  (a = x AND b = y AND c > z)
+    # with "<" for the descending ("-") columns
+    condition = Q()
+    for position, field in enumerate(ordering):
+        name = field.lstrip('-')
+        step = Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": values[position]})
+        for earlier, value in zip(ordering[:position], values):
+            step &= Q(**{earlier.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, size=PAGE_SIZE):
+    """
+    One page of queryset ordered by ordering (e.g. ('show_time', 'id') or ('-release_date', '-id'), which must
+    end in a unique column). Returns (rows, next cursor or None). Raises BadCursor for a cursor we did not make.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(after(ordering, decode_cursor(queryset, ordering, cursor)))
+    rows = list(queryset[:size + 1])  # one extra row tells whether there is a next page
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    return rows, encode_cursor([getattr(rows[-1], field.lstrip('-')) for field in ordering])
@@ -0,0 +1,44 @@
+# our QR codes are rendered on request from a ticket's payload instead of being stored as a PNG per ticket.
+# The payload is deterministic, so a ticket always gives the same image: renders go through a bounded
+# in-memory LRU cache and the responses carry an ETag and Cache-Control so browsers and proxies keep them.
+import hashlib
+from functools import lru_cache
+from io import BytesIO
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+@lru_cache(maxsize=settings.QR_CACHE_SIZE)
+def render(payload, kind='png'):
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=8, border=2)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    if kind == 'svg':
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        # qrcode draws black on white in PIL mode "1", so this is a 1-bit PNG
+        qr.make_image().save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def qr_response(request, payload, kind='png', private=False):
+    kind = kind if kind in CONTENT_TYPES else 'png'
+    etag = '"%s"' % hashlib.sha256(f"{kind}:{payload}".encode()).hexdigest()[:32]
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(render(payload, kind), content_type=CONTENT_TYPES[kind])
+    response['ETag'] = etag
+    # a ticket's QR code is a bearer credential, no shared cache (or the browser's disk) may keep it
+    response['Cache-Control'] = 'private, no-store' if private else f'public, max-age={settings.QR_MAX_AGE}'
+    return response
@@ -27,12 +27,60 @@ SIGNED_URL_SECRET = os.environ.get(
     'b8c3af5f9e0f44f4bda3d298f5c0f3d7f83f2e9f4b6d4a0a9b17f3cd8c8f7a23'
 )
 
+# signed HLS URLs expire on multiples of this, so a title's URL stays the same (and cacheable) within a bucket
+SIGNED_URL_BUCKET_SECONDS = int(os.environ.get('SIGNED_URL_BUCKET_SECONDS', 300))
+
+# 🎞 Who sends HLS segments (streaming/hls.py): '' lets Django send them (os.sendfile under gunicorn),
+# 'X-Accel-Redirect' hands them to nginx (an internal location at HLS_ACCEL_PREFIX aliased to MEDIA_ROOT/hls/),
+# 'X-Sendfile' to Apache/lighttpd
+HLS_SENDFILE = os.environ.get('HLS_SENDFILE', '')
+HLS_ACCEL_PREFIX = os.environ.get('HLS_ACCEL_PREFIX', '/protected-hls/')
+
+# signs the ticket tokens in QR codes (reservations/tickets.py), keep it different from SIGNED_URL_SECRET
+TICKET_SIGNING_SECRET = os.environ.get(
+    'TICKET_SIGNING_SECRET',
+    '5d0c6a1e7f24b39c8e6f1a0b2d47c95e3f8a1b6c0d9e2f47a5b3c8d1e6f0a927'
+)
+
 CHAPA_SECRET_KEY = os.environ.get(
     'CHAPA_SECRET_KEY',
     'CHASECK_TEST-LVVM7kiTEAfpgTT9ULzRH4qm4dtac79i'
 )
 CHAPA_BASE_URL = 'https://api.chapa.co/v1/transaction/initialize'
 CHAPA_VERIFY_URL = 'https://api.chapa.co/v1/transaction/verify/'
+# set to the secret configured for the webhook in the Chapa dashboard to reject unsigned deliveries
+CHAPA_WEBHOOK_SECRET = os.environ.get('CHAPA_WEBHOOK_SECRET', '')
+
+# (connect, read) timeouts in seconds per Chapa operation, see cinema_reservation/chapa.py
+CHAPA_TIMEOUTS = {
+    'initialize': (3.05, 15),
+    'verify': (3.05, 5),
+}
+CHAPA_VERIFY_RETRIES = 2
+CHAPA_RETRY_BACKOFF = 0.25
+CHAPA_POOL_SIZE = int(os.environ.get('CHAPA_POOL_SIZE', 20))
+# connections the async views may have open to Chapa at once, per process
+CHAPA_ASYNC_POOL_SIZE = int(os.environ.get('CHAPA_ASYNC_POOL_SIZE', 200))
+# after this many failures in a row Chapa calls fail fast for CHAPA_CIRCUIT_RESET_SECONDS
+CHAPA_CIRCUIT_FAILURES = 5
+CHAPA_CIRCUIT_RESET_SECONDS = 30
+
+# 🔳 QR codes are rendered on request (cinema_reservation/qr.py): renders kept in memory, seconds clients may cache them
+QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', 1024))
+QR_MAX_AGE = 86400
+
+# 🔎 How often each process reloads its in-memory typeahead titles to catch edits made by other processes
+TYPEAHEAD_REFRESH_SECONDS = int(os.environ.get('TYPEAHEAD_REFRESH_SECONDS', 300))
+
+# 📄 How long the home/about pages stay cached for anonymous visitors (edits invalidate them sooner),
+# see cinema_reservation/pagecache.py
+PAGE_CACHE_SECONDS = int(os.environ.get('PAGE_CACHE_SECONDS', 600))
+
+# 🎟 How long a seat stays held for an unpaid checkout before it is released again
+SEAT_HOLD_MINUTES = int(os.environ.get('SEAT_HOLD_MINUTES', 10))
+
+# 💺 Create a show's seats on its first seat-map request instead of when the Movie is saved
+SEAT_INVENTORY_LAZY = os.environ.get('SEAT_INVENTORY_LAZY', 'False').lower() == 'true'
 
 # 🧩 Installed apps
 INSTALLED_APPS = [
@@ -45,12 +93,14 @@ INSTALLED_APPS = [
     'reservations',
     'streaming',
     'translations',
+    'jobs',
+    'search',
 ]
 
 # 🧱 Middleware
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # ✅ Add this
+    'cinema_reservation.middleware.WhiteNoiseMiddleware',  # ✅ WhiteNoise, async-capable
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'translations.middleware.JSONTranslationMiddleware',
@@ -90,7 +140,8 @@ if os.environ.get('DATABASE_URL'):
     DATABASES = {
         'default': dj_database_url.config(
             conn_max_age=600,
-            ssl_require=True
+            # set DATABASE_SSL_REQUIRE=false for a local Postgres without TLS
+            ssl_require=os.environ.get('DATABASE_SSL_REQUIRE', 'True').lower() == 'true'
         )
     }
 else:
@@ -98,6 +149,29 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # take the write lock when a transaction starts, so concurrent checkouts wait for each other
+                # (up to timeout seconds) instead of failing with "database is locked" mid-transaction
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
+
+# 🧠 Cache (page cache, see cinema_reservation/pagecache.py). Set REDIS_URL when running more than one process,
+# so every process sees the same invalidations.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
         }
     }
 
@@ -4,11 +4,16 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static  #  Helps us serve media files in development
 from django.contrib.admin import AdminSite
+from streaming import views as streaming_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('reservations.urls')),  # Your reservation app routes
     path('streaming/', include('streaming.urls', namespace='streaming')),  # Streaming app routes
+    path('search/', include('search.urls')),  # search box autocomplete
+
+    # HLS playlists and segments need a signed URL and a subscription, so they come before the media files below
+    path('media/hls/<path:path>', streaming_views.serve_hls, name='serve_hls'),
 
     # Django i18n URLs for language switching
     path('i18n/', include('django.conf.urls.i18n')),
@@ -7,3 +7,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinema_reservation.settings')
 
 application = get_wsgi_application()
+
+# load the search box titles now instead of on the first keystroke
+from search import typeahead  # noqa: E402
+typeahead.warm()
@@ -0,0 +1,36 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job, OutgoingEmail
+from .queue import enqueue
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['locked_at', 'last_error', 'created_at', 'finished_at']
+    actions = ['retry_jobs']
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_jobs(self, request, queryset):
+        count = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_after=timezone.now(), locked_at=None, finished_at=None
+        )
+        self.message_user(request, f"{count} job(s) queued again.")
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['claim', 'claimed_at', 'last_error', 'created_at', 'sent_at']
+    actions = ['resend']
+
+    @admin.action(description="Send selected emails again")
+    def resend(self, request, queryset):
+        count = queryset.filter(status='failed').update(status='pending', attempts=0)
+        if count:
+            enqueue('jobs.dispatch_mail')
+        self.message_user(request, f"{count} email(s) queued again.")
@@ -0,0 +1,11 @@
+# our jobs app runs slow work (QR codes, emails) in a separate worker process instead of inside requests
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        autodiscover_modules('tasks')  # imports every app's tasks.py so their tasks are registered
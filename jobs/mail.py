@@ -0,0 +1,115 @@
+# our outbox: mail is queued as OutgoingEmail rows and sent in batches, each batch over one SMTP connection,
+# so a message costs one SMTP transaction instead of a TLS handshake and login of its own.
+# queue_email() writes inside the caller's transaction and makes sure a dispatch job is waiting to drain the
+# outbox once it commits.
+import base64
+import uuid
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job, OutgoingEmail
+from .queue import enqueue
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+# a batch left 'sending' this long belongs to a worker that died, its messages go out again
+STALE_CLAIM = timedelta(minutes=10)
+
+
+class MailError(Exception):
+    pass
+
+
+def queue_email(message):
+    queue_emails([message])
+
+
+def queue_emails(messages):
+    """
+    Put EmailMessages in the outbox. Nothing is sent here; the jobs worker sends them in batches.
+    """
+    OutgoingEmail.objects.bulk_create([
+        OutgoingEmail(
+            subject=str(message.subject),
+            body=str(message.body),
+            from_email=message.from_email or '',
+            to=list(message.to),
+            attachments=[encode_attachment(*attachment) for attachment in message.attachments],
+        )
+        for message in messages
+    ], batch_size=500)
+
+    # one waiting dispatch job is enough, it drains everything that is pending when it runs
+    if not Job.objects.filter(name='jobs.dispatch_mail', status='queued', run_after__lte=timezone.now()).exists():
+        enqueue('jobs.dispatch_mail')
+
+
+def encode_attachment(filename, content, mimetype):
+    if isinstance(content, str):
+        content = content.encode()
+    return [filename, base64.b64encode(content).decode('ascii'), mimetype]
+
+
+def to_message(row):
+    message = EmailMessage(row.subject, row.body, row.from_email or None, row.to)
+    for filename, content, mimetype in row.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def claim_batch(batch_size, now=None):
+    now = now or timezone.now()
+    ids = list(
+        OutgoingEmail.objects.filter(Q(status='pending') | Q(status='sending', claimed_at__lte=now - STALE_CLAIM))
+        .order_by('id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return None
+    token = uuid.uuid4().hex
+    OutgoingEmail.objects.filter(
+        Q(status='pending') | Q(status='sending', claimed_at__lte=now - STALE_CLAIM), id__in=ids
+    ).update(status='sending', claim=token, claimed_at=now)
+    return list(OutgoingEmail.objects.filter(claim=token, status='sending').order_by('id'))
+
+
+def dispatch(batch_size=BATCH_SIZE):
+    """
+    Send everything pending in the outbox, batch_size messages per SMTP connection.
+    Returns the number sent; raises MailError (after recording it) when a batch had failures,
+    so the calling job is retried with backoff instead of hammering a broken SMTP server.
+    """
+    sent = 0
+    while True:
+        rows = claim_batch(batch_size)
+        if rows is None:
+            return sent
+        if not rows:
+            continue  # another worker claimed them first
+
+        delivered, errors = [], {}
+        try:
+            with get_connection() as connection:
+                for row in rows:
+                    try:
+                        connection.send_messages([to_message(row)])
+                        delivered.append(row.id)
+                    except Exception as e:
+                        errors[row.id] = repr(e)
+        except Exception as e:
+            # could not connect or log in at all
+            errors.update({row.id: repr(e) for row in rows if row.id not in delivered})
+
+        now = timezone.now()
+        OutgoingEmail.objects.filter(id__in=delivered).update(status='sent', sent_at=now, claim='', last_error='')
+        sent += len(delivered)
+        for row in rows:
+            if row.id in errors:
+                OutgoingEmail.objects.filter(id=row.id).update(
+                    status='failed' if row.attempts + 1 >= MAX_ATTEMPTS else 'pending',
+                    attempts=F('attempts') + 1, claim='', last_error=errors[row.id],
+                )
+        if errors:
+            raise MailError(f"{len(errors)} of {len(rows)} messages could not be sent")
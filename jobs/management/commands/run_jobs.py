@@ -0,0 +1,51 @@
+# the local worker for the jobs table. Keep one (or a few) running next to the web process, e.g.
+#   python manage.py run_jobs
+# or drain the queue once, e.g. from cron or after a deploy:
+#   python manage.py run_jobs --once
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import queue
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs, retrying failures with exponential backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when no job is due instead of waiting.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--stale-minutes', type=int, default=10,
+                            help="Take over jobs left running this long by a worker that died.")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_minutes'])
+        counts = {'done': 0, 'queued': 0, 'failed': 0}
+        try:
+            while True:
+                close_old_connections()
+                ran = 0
+                for job_id in queue.due_jobs(options['batch_size'], stale_after=stale_after):
+                    if not queue.claim(job_id, stale_after=stale_after):
+                        continue  # another worker got it
+                    job = Job.objects.get(id=job_id)
+                    status = queue.run(job)
+                    counts[status] += 1
+                    ran += 1
+                    if status != 'done':
+                        self.stderr.write(f"{job.name} #{job.id} attempt {job.attempts}: {status}")
+
+                if not ran:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Jobs done: {counts['done']}, retried: {counts['queued']}, failed: {counts['failed']}"
+        ))
@@ -0,0 +1,61 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+# one row per piece of background work, picked up by `python manage.py run_jobs`
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', _("Queued")),
+        ('running', _("Running")),
+        ('done', _("Done")),
+        ('failed', _("Failed")),
+    ]
+
+    name = models.CharField(_("Task"), max_length=100)
+    payload = models.JSONField(_("Payload"), default=dict, blank=True)
+    status = models.CharField(_("Status"), max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_("Max Attempts"), default=5)
+    # not picked up before this time, pushed back after every failed attempt
+    run_after = models.DateTimeField(_("Run After"), default=timezone.now)
+    locked_at = models.DateTimeField(_("Locked At"), null=True, blank=True)
+    last_error = models.TextField(_("Last Error"), blank=True)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+    finished_at = models.DateTimeField(_("Finished At"), null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} - {self.status}"
+
+
+# a message waiting in the outbox, sent in batches over one SMTP connection by jobs.mail.dispatch
+class OutgoingEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', _("Pending")),
+        ('sending', _("Sending")),
+        ('sent', _("Sent")),
+        ('failed', _("Failed")),
+    ]
+
+    subject = models.CharField(_("Subject"), max_length=255)
+    body = models.TextField(_("Body"))
+    from_email = models.CharField(_("From"), max_length=254, blank=True)
+    to = models.JSONField(_("To"), default=list)
+    # [filename, base64 content, mimetype] per attachment
+    attachments = models.JSONField(_("Attachments"), default=list, blank=True)
+    status = models.CharField(_("Status"), max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    claim = models.CharField(_("Claim"), max_length=32, blank=True, db_index=True)
+    claimed_at = models.DateTimeField(_("Claimed At"), null=True, blank=True)
+    last_error = models.TextField(_("Last Error"), blank=True)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+    sent_at = models.DateTimeField(_("Sent At"), null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'])]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
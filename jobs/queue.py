@@ -0,0 +1,84 @@
+# our job queue is a table, not a broker: enqueue() inserts a Job row and the run_jobs worker picks it up.
+# The row is inserted inside the caller's transaction, so the worker only ever sees it after that transaction
+# has committed, and it disappears along with it on a rollback. Jobs are claimed with a conditional UPDATE,
+# so several workers can share the table.
+import random
+import traceback
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+# retry delays grow as BACKOFF_SECONDS * 2 ** attempts, with jitter, but never beyond MAX_BACKOFF_SECONDS
+BACKOFF_SECONDS = 10
+MAX_BACKOFF_SECONDS = 3600
+
+
+def task(name):
+    """
+    Register a function as a job task:
+
+        @task('reservations.issue_ticket')
+        def issue_ticket(reservation_id): ...
+
+    Tasks live in an app's tasks.py and take JSON-serializable keyword arguments.
+    A task may run more than once (after a crash or a retry), so it must be safe to repeat.
+    """
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, max_attempts=5, run_after=None, **payload):
+    if name not in TASKS:
+        raise KeyError(f"Unknown task {name!r}")
+    return Job.objects.create(name=name, payload=payload, max_attempts=max_attempts, run_after=run_after or timezone.now())
+
+
+def claim(job_id, now=None, stale_after=timedelta(minutes=10)):
+    # True for the one worker that gets to run the job; a job left 'running' by a dead worker can be taken over
+    now = now or timezone.now()
+    return bool(Job.objects.filter(
+        Q(status='queued') | Q(status='running', locked_at__lte=now - stale_after),
+        id=job_id, run_after__lte=now,
+    ).update(status='running', locked_at=now, attempts=F('attempts') + 1))
+
+
+def due_jobs(limit, now=None, stale_after=timedelta(minutes=10)):
+    now = now or timezone.now()
+    return list(
+        Job.objects.filter(
+            Q(status='queued') | Q(status='running', locked_at__lte=now - stale_after),
+            run_after__lte=now,
+        ).order_by('run_after').values_list('id', flat=True)[:limit]
+    )
+
+
+def run(job):
+    """
+    Run a claimed job and record the outcome: done, queued again after a backoff, or failed once
+    it has used up its attempts. Returns the new status.
+    """
+    now = timezone.now()
+    try:
+        TASKS[job.name](**job.payload)
+    except Exception:
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(id=job.id).update(
+                status='failed', last_error=traceback.format_exc(), locked_at=None, finished_at=now
+            )
+            return 'failed'
+        delay = min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** job.attempts)
+        Job.objects.filter(id=job.id).update(
+            status='queued', last_error=traceback.format_exc(), locked_at=None,
+            run_after=now + timedelta(seconds=random.uniform(delay / 2, delay)),
+        )
+        return 'queued'
+
+    Job.objects.filter(id=job.id).update(status='done', locked_at=None, finished_at=timezone.now())
+    return 'done'
@@ -0,0 +1,8 @@
+# our tasks for the jobs app itself
+from .mail import dispatch
+from .queue import task
+
+
+@task('jobs.dispatch_mail')
+def dispatch_mail():
+    dispatch()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Movie, Reservation, Transaction
+from .models import Movie, Reservation, Transaction, PaymentVerification, CheckIn
 
 # this are basically our db models being registered on our django admin panel
 @admin.register(Movie)
@@ -9,9 +9,22 @@ class MovieAdmin(admin.ModelAdmin):
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
     list_display = ['user', 'email', 'movie', 'seat', 'reservation_time']
-    list_filter = ['movie', 'reservation_time']
+    list_filter = ['movie', 'reservation_time', 'is_paid', 'is_expired']
 
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ['reservation', 'transaction_id', 'amount', 'status', 'created_at']
+
+
+@admin.register(PaymentVerification)
+class PaymentVerificationAdmin(admin.ModelAdmin):
+    list_display = ['tx_ref', 'status', 'checked_at', 'created_at']
+    list_filter = ['status']
+    search_fields = ['tx_ref']
+
+
+@admin.register(CheckIn)
+class CheckInAdmin(admin.ModelAdmin):
+    list_display = ['reservation', 'movie', 'gate', 'scanned_at']
+    list_filter = ['movie', 'gate']
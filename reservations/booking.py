@@ -0,0 +1,186 @@
+# our booking service claims seats with a single conditional UPDATE instead of a read-check-write.
+# The UPDATE only matches a seat that is still free, so the affected row count tells us whether we won it,
+# which works the same way on SQLite and Postgres and never keeps a row lock open while we talk to Chapa.
+#
+# A claimed seat is only *held* until its hold expires (SEAT_HOLD_MINUTES). Paying turns the hold into a
+# booking; otherwise the seat becomes free again, either lazily (an expired hold can be claimed straight
+# away) or in bulk by the release_expired_holds command.
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .inventory import mark_seat, rebuild_occupancy
+from .models import Movie, Seat, Reservation, Transaction
+
+
+class SeatUnavailable(Exception):
+    pass
+
+
+def free_seat_q(now):
+    # a seat is free when it was never booked or when its unpaid hold has run out
+    return Q(is_booked=False) | Q(hold_expires_at__lte=now)
+
+
+def reserve_seat(movie, row, number, name, email, amount):
+    """
+    Claim a free seat (by its row and number) and create its pending Reservation and Transaction in one
+    short transaction. Raises Seat.DoesNotExist for an unknown seat and SeatUnavailable if someone else got it first.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(minutes=settings.SEAT_HOLD_MINUTES)
+
+    with db_transaction.atomic():
+        seat_id = Seat.objects.filter(movie=movie, row=row, number=number).values_list('id', flat=True).first()
+        if seat_id is None:
+            raise Seat.DoesNotExist
+
+        claimed = Seat.objects.filter(free_seat_q(now), id=seat_id).update(
+            is_booked=True, hold_expires_at=expires_at
+        )
+        if claimed != 1:
+            raise SeatUnavailable
+
+        # we may have taken over a lapsed hold the reaper has not cleaned up yet
+        _expire_reservations(Reservation.objects.filter(seat_id=seat_id, is_paid=False, is_expired=False))
+
+        reservation = Reservation.objects.create(
+            movie=movie,
+            seat_id=seat_id,
+            user=name,
+            email=email,
+            is_paid=False,
+            expires_at=expires_at
+        )
+
+        # unique transaction reference with UUID
+        tx_ref = f"reservation_{reservation.id}_{uuid.uuid4().hex[:8]}"
+        Transaction.objects.create(
+            reservation=reservation,
+            transaction_id=tx_ref,
+            amount=amount,
+            status='pending'
+        )
+
+        mark_seat(movie.id, row, number, True, hold_expires_at=expires_at)
+
+    return reservation, tx_ref
+
+
+def confirm_reservation(reservation):
+    """
+    Turn the reservation's hold into a paid booking. Returns False when the hold lapsed and the seat
+    has meanwhile gone to another buyer.
+    """
+    now = timezone.now()
+    with db_transaction.atomic():
+        # lock the seat first, in the same order reserve_seat touches rows, so the two never deadlock
+        seat = Seat.objects.select_for_update().get(id=reservation.seat_id)
+
+        if Reservation.objects.filter(id=reservation.id, is_expired=False).update(is_paid=True, expires_at=None):
+            Seat.objects.filter(id=reservation.seat_id).update(is_booked=True, hold_expires_at=None)
+        else:
+            # the payment came back after the hold expired, keep it only if the seat is still free
+            reclaimed = Seat.objects.filter(free_seat_q(now), id=reservation.seat_id).update(
+                is_booked=True, hold_expires_at=None
+            )
+            if not reclaimed:
+                return False
+            Reservation.objects.filter(id=reservation.id).update(is_paid=True, is_expired=False, expires_at=None)
+
+        Transaction.objects.filter(reservation_id=reservation.id).update(status='success')
+        mark_seat(seat.movie_id, seat.row, seat.number, True)
+
+    reservation.is_paid = True
+    reservation.is_expired = False
+    reservation.expires_at = None
+    return True
+
+
+def release_reservation(reservation):
+    # gives the seat back and drops the unpaid reservation (its Transaction goes with it via CASCADE).
+    # Matching on the hold's expiry makes sure we only free the seat if it is still our hold.
+    with db_transaction.atomic():
+        released = Seat.objects.filter(
+            id=reservation.seat_id, is_booked=True, hold_expires_at=reservation.expires_at
+        ).update(is_booked=False, hold_expires_at=None)
+        reservation.delete()
+        if released:
+            seat = Seat.objects.only('movie_id', 'row', 'number').get(id=reservation.seat_id)
+            mark_seat(seat.movie_id, seat.row, seat.number, False)
+
+
+def release_failed_reservations(reservation_ids):
+    """
+    Expire unpaid reservations whose payment failed and free their seats, in bulk. A seat is only freed
+    while it is still held for that reservation. Returns the number of seats released.
+    """
+    with db_transaction.atomic():
+        holds = list(
+            Reservation.objects.filter(id__in=reservation_ids, is_paid=False)
+            .values_list('seat_id', 'expires_at', 'movie_id')
+        )
+        _expire_reservations(Reservation.objects.filter(id__in=reservation_ids, is_paid=False, is_expired=False))
+
+        still_held = Q()
+        for seat_id, expires_at, _ in holds:
+            if expires_at:
+                still_held |= Q(id=seat_id, hold_expires_at=expires_at)
+        released = 0
+        if still_held:
+            released = Seat.objects.filter(still_held, is_booked=True).update(is_booked=False, hold_expires_at=None)
+
+    if released:
+        for movie in Movie.objects.filter(id__in={movie_id for _, _, movie_id in holds}):
+            rebuild_occupancy(movie)
+    return released
+
+
+def release_expired_holds(now=None, batch_size=500):
+    """
+    Expire unpaid reservations whose hold ran out and free their seats, a batch at a time.
+    Returns (expired reservations, released seats).
+    """
+    now = now or timezone.now()
+    expired = released = 0
+
+    while True:
+        ids = list(
+            Reservation.objects.filter(is_paid=False, is_expired=False, expires_at__lte=now)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with db_transaction.atomic():
+            expired += _expire_reservations(Reservation.objects.filter(id__in=ids, is_paid=False, is_expired=False))
+
+    movie_ids = set()
+    while True:
+        seats = list(
+            Seat.objects.filter(is_booked=True, hold_expires_at__lte=now)
+            .values_list('id', 'movie_id')[:batch_size]
+        )
+        if not seats:
+            break
+        released += Seat.objects.filter(id__in=[seat_id for seat_id, _ in seats], hold_expires_at__lte=now).update(
+            is_booked=False, hold_expires_at=None
+        )
+        movie_ids.update(movie_id for _, movie_id in seats)
+
+    # one rebuild per affected show is cheaper than flipping bits seat by seat
+    for movie in Movie.objects.filter(id__in=movie_ids):
+        rebuild_occupancy(movie, now)
+
+    return expired, released
+
+
+def _expire_reservations(reservations):
+    ids = list(reservations.values_list('id', flat=True))
+    if not ids:
+        return 0
+    Transaction.objects.filter(reservation_id__in=ids, status='pending').update(status='expired')
+    return Reservation.objects.filter(id__in=ids).update(is_expired=True)
@@ -0,0 +1,118 @@
+# our check-in at the door. When doors open the show's paid reservation ids are loaded once into an in-memory set,
+# so checking a scan is a signature check (reservations.tickets) plus a set lookup. Gate devices push their scans
+# in batches and a whole batch is written with one INSERT; the unique reservation on CheckIn decides which scan
+# of a ticket came first, across devices and worker processes.
+import threading
+import time
+import uuid
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import CheckIn, Reservation
+from .tickets import verify_ticket
+
+# a show's tickets are dropped from memory this long after its doors opened, a late scan just loads them again
+DOORS_OPEN_SECONDS = 4 * 60 * 60
+
+_paid = {}  # movie id -> (set of paid reservation ids, time.monotonic() when it is dropped)
+_lock = threading.Lock()
+
+
+def open_doors(movie_id):
+    """
+    (Re)load the paid tickets of a show. Returns how many there are.
+    """
+    return len(load(movie_id))
+
+
+def load(movie_id):
+    ids = set(Reservation.objects.filter(movie_id=movie_id, is_paid=True).values_list('id', flat=True))
+    now = time.monotonic()
+    with _lock:
+        # shows whose doors closed since, so the process only keeps the shows being scanned now
+        for stale in [stale for stale, (_ids, until) in _paid.items() if until <= now]:
+            del _paid[stale]
+        _paid[movie_id] = (ids, now + DOORS_OPEN_SECONDS)
+    return ids
+
+
+def paid_ids(movie_id):
+    entry = _paid.get(movie_id)
+    if entry is None or entry[1] <= time.monotonic():
+        return load(movie_id)
+    return entry[0]
+
+
+def is_paid(movie_id, reservation_id):
+    ids = paid_ids(movie_id)
+    if reservation_id in ids:
+        return True
+    # bought after the doors opened: one lookup, then it is in the set too
+    if Reservation.objects.filter(id=reservation_id, movie_id=movie_id, is_paid=True).exists():
+        with _lock:
+            ids.add(reservation_id)
+        return True
+    return False
+
+
+def scan_time(value, now):
+    # when the device saw the ticket: now if it didn't say, None if what it sent is not a time
+    if not value:
+        return now
+    try:
+        scanned_at = parse_datetime(value)
+    except (ValueError, TypeError):
+        return None
+    if scanned_at and timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at)
+    return scanned_at
+
+
+def sync(movie_id, scans, gate=''):
+    """
+    Record a batch of scans for a show. scans is a list of {'token': ..., 'scanned_at': ISO time (optional),
+    'gate': ... (optional)}. Returns one result per scan with a status of 'ok', 'duplicate', 'invalid'
+    (also for a malformed scan), 'wrong_show' or 'not_paid'; duplicates say when and at which gate the ticket
+    was first let in.
+    """
+    now = timezone.now()
+    batch = uuid.uuid4().hex
+    results, rows, first_scans = [], {}, {}
+    for scan in scans:
+        token = scan.get('token') if isinstance(scan, dict) else None
+        result = {'token': token if isinstance(token, str) else None}
+        results.append(result)
+        ticket = verify_ticket(token) if isinstance(token, str) else None
+        scanned_at = scan_time(scan.get('scanned_at'), now) if ticket else None
+        if ticket is None or scanned_at is None:
+            result['status'] = 'invalid'
+            continue
+        result.update(ticket)
+        if ticket['movie'] != movie_id:
+            result['status'] = 'wrong_show'
+        elif not is_paid(movie_id, ticket['reservation']):
+            result['status'] = 'not_paid'
+        elif ticket['reservation'] not in rows:
+            rows[ticket['reservation']] = CheckIn(
+                reservation_id=ticket['reservation'], movie_id=movie_id, batch=batch,
+                gate=str(scan.get('gate') or gate)[:50], scanned_at=scanned_at,
+            )
+
+    if rows:
+        CheckIn.objects.bulk_create(rows.values(), ignore_conflicts=True)
+        first_scans = {
+            row['reservation_id']: row
+            for row in CheckIn.objects.filter(reservation_id__in=rows).values('reservation_id', 'batch', 'gate', 'scanned_at')
+        }
+    claimed = set()
+    for result in results:
+        if 'status' in result:
+            continue
+        first = first_scans[result['reservation']]
+        if first['batch'] == batch and result['reservation'] not in claimed:
+            claimed.add(result['reservation'])
+            result['status'] = 'ok'
+        else:
+            result.update(status='duplicate', first_gate=first['gate'], first_scanned_at=first['scanned_at'].isoformat())
+    return results
@@ -0,0 +1,70 @@
+# our seat events fan out seat changes to the buyers watching a show, entirely in-process.
+# Every connected seat page (Server-Sent Events, served through asgi.py) owns a small asyncio queue; publishing
+# just drops the event on each queue of that show, so thousands of idle listeners cost nothing but memory.
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.db import transaction as db_transaction
+
+from cinema_reservation import pagecache
+
+
+class SeatEventBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._listeners = defaultdict(set)
+
+    def subscribe(self, movie_id):
+        # must be called from the listener's event loop
+        listener = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._listeners[movie_id].add(listener)
+        return listener
+
+    def unsubscribe(self, movie_id, listener):
+        with self._lock:
+            listeners = self._listeners.get(movie_id)
+            if listeners:
+                listeners.discard(listener)
+                if not listeners:
+                    del self._listeners[movie_id]
+
+    def listener_count(self, movie_id):
+        with self._lock:
+            return len(self._listeners.get(movie_id, ()))
+
+    def publish(self, movie_id, event):
+        # safe from any thread, sync views publish into the ASGI event loop
+        with self._lock:
+            listeners = list(self._listeners.get(movie_id, ()))
+        for loop, queue in listeners:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # the listener's loop is already closed
+                pass
+
+    @staticmethod
+    def _offer(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # a client this far behind resyncs from the seat-map version anyway
+            pass
+
+
+broker = SeatEventBroker()
+
+
+def publish_seat_event(movie_id, event_type, version, index=None):
+    """
+    Announce a seat change once the surrounding transaction has committed.
+    event_type is 'held', 'booked', 'released' or 'refresh' (the whole map changed).
+    """
+    event = {'type': event_type, 'version': version}
+    if index is not None:
+        event['index'] = index
+    db_transaction.on_commit(lambda: broker.publish(movie_id, event))
+    db_transaction.on_commit(lambda: pagecache.invalidate('seats'))  # the cinema page shows seats left
@@ -0,0 +1,194 @@
+# our inventory module builds and resizes the Seat rows of a show.
+# Seats are written with bulk_create in batches, so a 20x30 hall costs a couple of INSERTs instead of 600,
+# and resizing a hall only adds or removes the seats that actually changed.
+#
+# It also keeps each show's ShowInventory bitmap in step with the seats, so reads never have to scan them.
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .events import publish_seat_event
+from .models import Movie, Seat, ShowInventory
+
+SEAT_BATCH_SIZE = 500
+
+
+def row_label(row):
+    # 1 -> 'A', 26 -> 'Z', 27 -> 'AA' ...
+    label = ''
+    while row > 0:
+        row, remainder = divmod(row - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
+
+
+def seat_label(row, number):
+    return f"{row_label(row)}{number}"
+
+
+def materialize_seats(movie):
+    """
+    Create every seat of the show once. Safe to call from concurrent requests: only the caller that
+    flips seats_materialized does the inserts, and it only adds seats that are not there yet.
+    """
+    with db_transaction.atomic():
+        if not Movie.objects.filter(id=movie.id, seats_materialized=False).update(seats_materialized=True):
+            movie.seats_materialized = True
+            return 0
+        added, _ = reconcile_seats(movie)
+
+    movie.seats_materialized = True
+    return added
+
+
+def reconcile_seats(movie):
+    """
+    Bring the seats in line with the movie's current num_rows / seats_per_row.
+    Missing seats are added; seats outside the new layout are removed unless someone has reserved them.
+    Returns (added, removed).
+    """
+    with db_transaction.atomic():
+        existing = set(Seat.objects.filter(movie=movie).values_list('row', 'number'))
+        wanted = {
+            (row, number)
+            for row in range(1, movie.num_rows + 1)
+            for number in range(1, movie.seats_per_row + 1)
+        }
+
+        missing = sorted(wanted - existing)
+        Seat.objects.bulk_create(
+            [Seat(movie=movie, seat_number=seat_label(row, number), row=row, number=number) for row, number in missing],
+            batch_size=SEAT_BATCH_SIZE
+        )
+
+        removed = 0
+        if existing - wanted:
+            outside = Seat.objects.filter(movie=movie).exclude(row__lte=movie.num_rows, number__lte=movie.seats_per_row)
+            removed, _ = outside.filter(is_booked=False, reservation__isnull=True).delete()
+
+        # the layout changed, so the bitmap has to be laid out again
+        rebuild_occupancy(movie)
+
+    return len(missing), removed
+
+
+# ------------------- Occupancy bitmap -------------------
+def rebuild_occupancy(movie, now=None):
+    # recomputes the show's bitmap from its Seat rows, leaving lapsed holds out
+    now = now or timezone.now()
+    with db_transaction.atomic():
+        # lock the inventory row before reading the seats, like mark_seat does: a hold committed between the
+        # read and the write would otherwise be wiped from the bitmap
+        if ShowInventory.objects.select_for_update().filter(movie_id=movie.id).first() is None:
+            try:
+                with db_transaction.atomic():
+                    ShowInventory.objects.create(movie_id=movie.id)
+            except IntegrityError:
+                pass  # another request created it first
+            ShowInventory.objects.select_for_update().filter(movie_id=movie.id).first()
+        inventory = write_occupancy(movie, now)
+    publish_seat_event(movie.id, 'refresh', inventory.version)
+    return inventory
+
+
+def write_occupancy(movie, now):
+    # the part of rebuild_occupancy that runs with the inventory row locked
+    inventory = ShowInventory(movie_id=movie.id, num_rows=movie.num_rows, seats_per_row=movie.seats_per_row)
+    bits = bytearray((movie.num_rows * movie.seats_per_row + 7) // 8)
+    taken = 0
+    next_hold_expiry = None
+
+    booked = Seat.objects.filter(
+        Q(hold_expires_at__isnull=True) | Q(hold_expires_at__gt=now), movie=movie, is_booked=True
+    ).values_list('row', 'number', 'hold_expires_at')
+    for row, number, hold_expires_at in booked:
+        index = inventory.seat_index(row, number)
+        if index is None:
+            continue
+        bits[index >> 3] |= 1 << (index & 7)
+        taken += 1
+        if hold_expires_at and (next_hold_expiry is None or hold_expires_at < next_hold_expiry):
+            next_hold_expiry = hold_expires_at
+
+    inventory.occupancy = bytes(bits)
+    inventory.seats_free = movie.num_rows * movie.seats_per_row - taken
+    inventory.next_hold_expiry = next_hold_expiry
+
+    fields = {
+        'num_rows': inventory.num_rows,
+        'seats_per_row': inventory.seats_per_row,
+        'occupancy': inventory.occupancy,
+        'seats_free': inventory.seats_free,
+        'next_hold_expiry': inventory.next_hold_expiry,
+    }
+    ShowInventory.objects.filter(movie_id=movie.id).update(version=F('version') + 1, **fields)
+    inventory.version = ShowInventory.objects.values_list('version', flat=True).get(movie_id=movie.id)
+    return inventory
+
+
+def mark_seat(movie_id, row, number, taken, hold_expires_at=None):
+    """
+    Flip one seat's bit. Meant to run inside the transaction that changes the Seat, and late in it,
+    because the show's inventory row stays locked until that transaction ends.
+    """
+    with db_transaction.atomic():
+        inventory = ShowInventory.objects.select_for_update().filter(movie_id=movie_id).first()
+        if inventory is None:
+            rebuild_occupancy(Movie.objects.get(id=movie_id))
+            return
+
+        index = inventory.seat_index(row, number)
+        if index is None:
+            return
+        bits = bytearray(inventory.occupancy)
+        mask = 1 << (index & 7)
+        was_taken = bool(bits[index >> 3] & mask)
+        if taken:
+            bits[index >> 3] |= mask
+        else:
+            bits[index >> 3] &= ~mask & 0xFF
+
+        next_hold_expiry = inventory.next_hold_expiry
+        if taken and hold_expires_at and (next_hold_expiry is None or hold_expires_at < next_hold_expiry):
+            next_hold_expiry = hold_expires_at
+
+        ShowInventory.objects.filter(movie_id=movie_id).update(
+            occupancy=bytes(bits),
+            seats_free=inventory.seats_free + int(was_taken) - int(taken),
+            next_hold_expiry=next_hold_expiry,
+            version=F('version') + 1,
+        )
+
+        # the row is locked, so the version we just wrote is exactly one more than the one we read
+        if not taken:
+            event_type = 'released'
+        else:
+            event_type = 'held' if hold_expires_at else 'booked'
+        publish_seat_event(movie_id, event_type, inventory.version + 1, index)
+
+
+def get_occupancy(movie, now=None):
+    # one-row read; only falls back to the Seat rows when a hold in the bitmap has lapsed
+    now = now or timezone.now()
+    inventory = ShowInventory.objects.filter(movie_id=movie.id).first()
+    if inventory is None or (inventory.next_hold_expiry and inventory.next_hold_expiry <= now):
+        inventory = rebuild_occupancy(movie, now)
+    return inventory
+
+
+def seat_map(inventory):
+    # rows of seats for the seat selection template, built from the bitmap alone
+    occupancy = bytes(inventory.occupancy)
+    rows = []
+    for row in range(1, inventory.num_rows + 1):
+        seats = []
+        for number in range(1, inventory.seats_per_row + 1):
+            index = (row - 1) * inventory.seats_per_row + (number - 1)
+            seats.append({
+                'key': f"{row}-{number}",
+                'index': index,
+                'label': seat_label(row, number),
+                'is_taken': bool(occupancy[index >> 3] & (1 << (index & 7))),
+            })
+        rows.append(seats)
+    return rows
@@ -0,0 +1,252 @@
+# simulates an on-sale: seeds a show, then drives concurrent buyers through seat selection and payment
+# against a local stand-in for Chapa, and reports latency percentiles, throughput, lock waits and double bookings.
+# It uses whatever database DATABASES points at, so run it once with SQLite and once with DATABASE_URL set, e.g.
+#   python manage.py loadtest_onsale --buyers 500 --concurrency 100
+#   DATABASE_URL=postgres://localhost/qine DATABASE_SSL_REQUIRE=false python manage.py loadtest_onsale
+import base64
+import json
+import logging
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from reservations.inventory import rebuild_occupancy
+from reservations.models import Movie, Reservation, ShowInventory
+
+STEPS = ['seat_page', 'seat_map', 'checkout', 'payment_success', 'payment_verify']
+
+
+class FakeChapaHandler(BaseHTTPRequestHandler):
+    # answers initialize and verify the way Chapa does, after an optional artificial delay
+    latency = 0.0
+
+    def _reply(self, payload):
+        time.sleep(self.latency)
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        data = json.loads(self.rfile.read(length) or b'{}')
+        tx_ref = data.get('tx_ref', '')
+        host, port = self.server.server_address
+        self._reply({
+            'status': 'success',
+            'data': {'checkout_url': f"http://{host}:{port}/checkout/{tx_ref}"},
+        })
+
+    def do_GET(self):
+        tx_ref = self.path.rstrip('/').rsplit('/', 1)[-1]
+        self._reply({'status': 'success', 'data': {'status': 'success', 'tx_ref': tx_ref}})
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = "Load-test the checkout flow with concurrent simulated buyers against a local fake Chapa server."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--rows', type=int, default=10)
+        parser.add_argument('--seats-per-row', type=int, default=20)
+        parser.add_argument(
+            '--hot-seats', type=int, default=0,
+            help="Make every buyer compete for the first N seats instead of picking any free seat."
+        )
+        parser.add_argument('--chapa-latency-ms', type=int, default=50)
+        parser.add_argument('--retries', type=int, default=3, help="Seat attempts per buyer after losing a seat.")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded show and its bookings.")
+
+    def handle(self, *args, **options):
+        FakeChapaHandler.latency = options['chapa_latency_ms'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FakeChapaHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        chapa_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        movie = Movie.objects.create(
+            title=f"Load test {timezone.now():%Y-%m-%d %H:%M:%S}",
+            show_time=timezone.now() + timedelta(days=1),
+            num_rows=options['rows'],
+            seats_per_row=options['seats_per_row'],
+        )
+        self.stdout.write(f"Seeded show {movie.id} with {movie.num_rows * movie.seats_per_row} seats "
+                          f"on {connection.vendor}, fake Chapa at {chapa_url}")
+
+        self.timings = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.lock = threading.Lock()
+        sampler_stop = threading.Event()
+        sampler = threading.Thread(target=self.sample_lock_waits, args=(sampler_stop,), daemon=True)
+
+        try:
+            with tempfile.TemporaryDirectory() as media_root, override_settings(
+                CHAPA_BASE_URL=f"{chapa_url}/initialize",
+                CHAPA_VERIFY_URL=f"{chapa_url}/verify/",
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                MEDIA_ROOT=media_root,
+            ):
+                # failed requests are counted below, their tracebacks would only drown the report
+                logging.getLogger('django.request').setLevel(logging.CRITICAL)
+                sampler.start()
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                    list(pool.map(lambda n: self.run_buyer(movie, options), range(options['buyers'])))
+                elapsed = time.perf_counter() - started
+                sampler_stop.set()
+                sampler.join()
+
+            self.report(movie, elapsed)
+        finally:
+            server.shutdown()
+            server.server_close()
+            if not options['keep']:
+                movie.delete()
+
+    # ------------------- Simulated buyer -------------------
+    def run_buyer(self, movie, options):
+        client = Client(HTTP_HOST='localhost')
+        try:
+            self.timed('seat_page', client.get, f"/movie/{movie.id}/seats/")
+            for attempt in range(options['retries'] + 1):
+                seat = self.pick_seat(client, movie, options['hot_seats'])
+                if seat is None:
+                    self.count('sold_out')
+                    return
+
+                response = self.timed('checkout', client.post, f"/movie/{movie.id}/seats/", {
+                    'seat': seat, 'name': 'Load Tester', 'email': 'loadtest@example.com',
+                })
+                if response is None:
+                    return
+                if response.status_code != 302:
+                    self.count('seat_conflicts')
+                    continue
+
+                # the fake checkout URL ends with the tx_ref
+                tx_ref = response['Location'].rstrip('/').rsplit('/', 1)[-1]
+                self.timed('payment_success', client.get, '/payment/success/', {'tx_ref': tx_ref})
+                self.timed('payment_verify', client.get, '/payment/verify/', {'tx_ref': tx_ref})
+                self.count('tickets')
+                return
+            self.count('gave_up')
+        finally:
+            connections.close_all()
+
+    def pick_seat(self, client, movie, hot_seats):
+        response = self.timed('seat_map', client.get, f"/movie/{movie.id}/seats.json")
+        if response is None or response.status_code != 200:
+            return None
+        data = response.json()
+        total = data['num_rows'] * data['seats_per_row']
+        if hot_seats:
+            total = min(total, hot_seats)
+        bits = base64.b64decode(data['occupancy'])
+        free = [index for index in range(total) if not bits[index >> 3] & (1 << (index & 7))]
+        if not free:
+            return None
+        index = random.choice(free)
+        row, number = divmod(index, data['seats_per_row'])
+        return f"{row + 1}-{number + 1}"
+
+    def timed(self, step, call, *args):
+        started = time.perf_counter()
+        try:
+            response = call(*args)
+        except OperationalError as error:
+            # SQLite reports writers that waited past the busy timeout this way
+            self.count('lock_timeouts' if 'locked' in str(error) else 'db_errors')
+            return None
+        except Exception:
+            self.count('errors')
+            return None
+        finally:
+            with self.lock:
+                self.timings[step].append(time.perf_counter() - started)
+        if response.status_code >= 500:
+            self.count('errors')
+        return response
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def sample_lock_waits(self, stop):
+        # Postgres exposes sessions blocked on a lock; SQLite lock waits show up as lock_timeouts instead
+        if connection.vendor != 'postgresql':
+            return
+        samples = []
+        try:
+            with connections['default'].cursor() as cursor:
+                while not stop.wait(0.05):
+                    cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock'")
+                    samples.append(cursor.fetchone()[0])
+        finally:
+            connections.close_all()
+        self.lock_wait_samples = samples
+
+    # ------------------- Report -------------------
+    def report(self, movie, elapsed):
+        self.stdout.write("")
+        self.stdout.write(f"{'step':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for step in STEPS:
+            values = self.timings.get(step, [])
+            self.stdout.write(
+                f"{step:<16}{len(values):>8}"
+                f"{percentile(values, 0.50) * 1000:>10.1f}"
+                f"{percentile(values, 0.95) * 1000:>10.1f}"
+                f"{percentile(values, 0.99) * 1000:>10.1f}"
+            )
+
+        requests_made = sum(len(values) for values in self.timings.values())
+        self.stdout.write("")
+        self.stdout.write(f"Wall time: {elapsed:.2f}s")
+        self.stdout.write(f"Throughput: {requests_made / elapsed:.1f} requests/s, "
+                          f"{self.counters['tickets'] / elapsed:.1f} tickets/s")
+        for name in ['tickets', 'seat_conflicts', 'sold_out', 'gave_up', 'lock_timeouts', 'db_errors', 'errors']:
+            self.stdout.write(f"{name.replace('_', ' ').capitalize()}: {self.counters[name]}")
+
+        samples = getattr(self, 'lock_wait_samples', None)
+        if samples:
+            self.stdout.write(f"Lock waits (Postgres sessions blocked): max {max(samples)}, "
+                              f"mean {sum(samples) / len(samples):.2f} over {len(samples)} samples")
+
+        double_booked = (
+            Reservation.objects.filter(movie=movie, is_expired=False)
+            .values('seat').annotate(holders=Count('id')).filter(holders__gt=1)
+        )
+        stored = ShowInventory.objects.filter(movie=movie).first()
+        rebuilt = rebuild_occupancy(movie)
+        bitmap_ok = stored is not None and bytes(stored.occupancy) == bytes(rebuilt.occupancy)
+
+        self.stdout.write(f"Paid tickets: {Reservation.objects.filter(movie=movie, is_paid=True).count()}")
+        doubles = double_booked.count()
+        style = self.style.SUCCESS if doubles == 0 else self.style.ERROR
+        self.stdout.write(style(f"Double-booked seats: {doubles}"))
+        style = self.style.SUCCESS if bitmap_ok else self.style.ERROR
+        self.stdout.write(style(f"Occupancy bitmap matches seats: {bitmap_ok}"))
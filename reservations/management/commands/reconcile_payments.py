@@ -0,0 +1,135 @@
+# reconciles payments whose buyer never came back through the return URL (closed tab, lost callback).
+# Pending cinema transactions and unpaid streaming subscriptions older than --older-than are checked with Chapa
+# from a small thread pool, and the outcomes are applied a batch at a time. Each tx_ref is claimed through the
+# same PaymentVerification row the return pages use, so this can run from cron next to live traffic, e.g.
+#   */10 * * * * python manage.py reconcile_payments
+# and an interrupted run just leaves the rest for the next one.
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cinema_reservation import chapa
+from reservations import booking, payments
+from reservations.models import PaymentVerification, Transaction
+from streaming import subscriptions
+from streaming.models import StreamingSubscription, Transaction as StreamingTransaction
+
+# tx_refs with one of these stored outcomes are settled and never asked about again
+SETTLED = ['verified', 'failed', 'hold_lost']
+
+
+def ask_chapa(tx_ref):
+    # runs in the pool, network only: every database write stays on the main thread
+    try:
+        return tx_ref, chapa.verify_payment(tx_ref)
+    except chapa.ChapaError:
+        return tx_ref, None
+
+
+class Command(BaseCommand):
+    help = "Verify old pending Chapa payments and mark them paid, or failed and release their seats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=30, help="Minutes a payment must be pending for.")
+        parser.add_argument('--max-age', type=int, default=72, help="Hours after which payments are left alone.")
+        parser.add_argument('--workers', type=int, default=8, help="Chapa calls in flight at once.")
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        window = {
+            'created_at__lte': now - timedelta(minutes=options['older_than']),
+            'created_at__gte': now - timedelta(hours=options['max_age']),
+        }
+        settled = PaymentVerification.objects.filter(status__in=SETTLED).values('tx_ref')
+        tickets = (
+            Transaction.objects.filter(status__in=['pending', 'expired'], **window)
+            .exclude(transaction_id__in=settled)
+        )
+        plans = StreamingSubscription.objects.filter(is_paid=False, **window).exclude(chapa_tx_ref__in=settled)
+
+        self.counts = {'checked': 0, 'verified': 0, 'hold_lost': 0, 'failed': 0, 'pending': 0, 'errors': 0,
+                       'skipped': 0, 'seats_released': 0}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for batch in self.batches(tickets, 'transaction_id', options['batch_size']):
+                self.apply_tickets(self.check(pool, batch))
+            for batch in self.batches(plans, 'chapa_tx_ref', options['batch_size']):
+                self.apply_subscriptions(self.check(pool, batch))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(", ".join(f"{name.replace('_', ' ')}: {count}" for name, count in self.counts.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {self.counts['checked']} payments in {elapsed:.2f}s "
+            f"({self.counts['checked'] / elapsed if elapsed else 0:.1f}/s)"
+        ))
+
+    def batches(self, queryset, field, batch_size):
+        # keyset pagination on id, rows settled by an earlier batch drop out of the query on their own
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', field)[:batch_size])
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [tx_ref for _, tx_ref in rows]
+
+    def check(self, pool, tx_refs):
+        # claims the batch, asks Chapa about the claimed ones in parallel and returns {tx_ref: result or None}
+        claimed = [tx_ref for tx_ref in tx_refs if payments.claim(tx_ref)]
+        self.counts['skipped'] += len(tx_refs) - len(claimed)
+        self.counts['checked'] += len(claimed)
+        results = dict(pool.map(ask_chapa, claimed))
+
+        unreachable = [tx_ref for tx_ref, result in results.items() if result is None]
+        if unreachable:
+            self.counts['errors'] += len(unreachable)
+            PaymentVerification.objects.filter(tx_ref__in=unreachable, status='verifying').update(status='pending')
+        return {tx_ref: result for tx_ref, result in results.items() if result is not None}
+
+    def apply_tickets(self, results):
+        failed, recorded = [], []
+        for tx_ref, result in results.items():
+            status = payments.outcome(result)
+            if status == 'verified':
+                # confirms the seat and sends the ticket, one by one since each gets its own email
+                status = payments.record(tx_ref, result)
+                recorded.append(tx_ref)
+            elif status == 'failed':
+                failed.append(tx_ref)
+            self.counts[status] += 1
+
+        if failed:
+            reservation_ids = list(
+                Transaction.objects.filter(transaction_id__in=failed).values_list('reservation_id', flat=True)
+            )
+            Transaction.objects.filter(transaction_id__in=failed).update(status='failed')
+            self.counts['seats_released'] += booking.release_failed_reservations(reservation_ids)
+        self.store(results, exclude=recorded)
+
+    def apply_subscriptions(self, results):
+        failed = []
+        for tx_ref, result in results.items():
+            status = payments.outcome(result)
+            if status == 'verified':
+                subscriptions.activate(StreamingSubscription.objects.get(chapa_tx_ref=tx_ref))
+            elif status == 'failed':
+                failed.append(tx_ref)
+            self.counts[status] += 1
+
+        if failed:
+            StreamingTransaction.objects.filter(tx_ref__in=failed, status='initiated').update(status='failed')
+        self.store(results)
+
+    def store(self, results, exclude=()):
+        # writes Chapa's answers to the claimed PaymentVerification rows in one bulk update
+        rows = list(PaymentVerification.objects.filter(tx_ref__in=[tx_ref for tx_ref in results if tx_ref not in exclude]))
+        now = timezone.now()
+        for row in rows:
+            row.result = results[row.tx_ref]
+            row.status = payments.outcome(row.result)
+            row.checked_at = now
+        PaymentVerification.objects.bulk_update(rows, ['result', 'status', 'checked_at'])
@@ -0,0 +1,27 @@
+# releases seats held by checkouts that were never paid. Run it from cron, or leave it running with --interval.
+import time
+
+from django.core.management.base import BaseCommand
+
+from reservations.booking import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Expire unpaid reservations whose seat hold ran out and release their seats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and sweep every N seconds (default: sweep once and exit)."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            expired, released = release_expired_holds(batch_size=options['batch_size'])
+            if expired or released:
+                self.stdout.write(f"Expired {expired} reservations, released {released} seats.")
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,63 @@
+# emails every paid ticket holder of the shows starting in the next --hours, once per ticket. Run it from cron, e.g.
+#   0 * * * * python manage.py send_show_reminders --hours 3
+# The reminders go through the outbox and are sent right away in batches, each batch over one SMTP connection.
+from datetime import timedelta
+
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from jobs.mail import dispatch, queue_emails
+from reservations.models import Movie, Reservation
+
+
+def reminder_email(reservation, movie):
+    show_time = timezone.localtime(movie.show_time).strftime('%Y-%m-%d %H:%M')
+    subject = _("⏰ Reminder: '%(title)s' starts soon | ⏰ ማስታወሻ") % {'title': movie.title}
+    body = _(
+        "Hello %(name)s,\n\n"
+        "🎬 '%(title)s' starts at %(time)s.\n"
+        "🎫 Seat: %(seat)s\n\n"
+        "Please have your ticket QR code ready at the entrance.\n\n"
+        "------------------------------\n"
+        "ሰላም %(name)s,\n\n"
+        "🎬 '%(title)s' በ %(time)s ይጀምራል።\n"
+        "🎫 መቀመጫ: %(seat)s\n\n"
+        "እባክዎ የትኬትዎን የQR ኮድ በመግቢያ ቦታ ያዘጋጁ።"
+    ) % {'name': reservation.user, 'title': movie.title, 'time': show_time, 'seat': reservation.seat.seat_number}
+    return EmailMessage(subject, body, to=[reservation.email])
+
+
+class Command(BaseCommand):
+    help = "Email a reminder to every paid reservation of the shows starting soon."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=3, help="Remind about shows starting within this many hours.")
+        parser.add_argument('--movie', type=int, help="Only this show (by id), whenever it starts.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['movie']:
+            movies = Movie.objects.filter(id=options['movie'])
+        else:
+            movies = Movie.objects.filter(show_time__gt=now, show_time__lte=now + timedelta(hours=options['hours']))
+
+        queued = 0
+        for movie in movies:
+            with db_transaction.atomic():
+                # locking the show keeps two runs from both picking up its tickets
+                Movie.objects.select_for_update().filter(id=movie.id).first()
+                reservations = list(
+                    Reservation.objects.filter(movie=movie, is_paid=True, reminder_sent=False).select_related('seat')
+                )
+                if not reservations:
+                    continue
+                queue_emails([reminder_email(reservation, movie) for reservation in reservations])
+                Reservation.objects.filter(id__in=[reservation.id for reservation in reservations]).update(reminder_sent=True)
+            queued += len(reservations)
+            self.stdout.write(f"{movie.title}: {len(reservations)} reminder(s) queued")
+
+        sent = dispatch() if queued else 0
+        self.stdout.write(self.style.SUCCESS(f"Reminders queued: {queued}, emails sent: {sent}"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0019_remove_movie_trailer_file_remove_movie_trailer_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Expires At'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='is_expired',
+            field=models.BooleanField(default=False, verbose_name='Is Expired'),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Hold Expires At'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+import re
+
+from django.db import migrations, models
+
+
+def backfill_seat_positions(apps, schema_editor):
+    # existing seats only have a label like "B7", derive row=2, number=7 from it
+    Movie = apps.get_model('reservations', 'Movie')
+    Seat = apps.get_model('reservations', 'Seat')
+
+    seats = []
+    for seat in Seat.objects.only('id', 'seat_number').iterator():
+        match = re.fullmatch(r'([A-Z]+)(\d+)', str(seat.seat_number).strip().upper())
+        if not match:
+            continue
+        row = 0
+        for letter in match.group(1):
+            row = row * 26 + ord(letter) - 64
+        seat.row, seat.number = row, int(match.group(2))
+        seats.append(seat)
+    Seat.objects.bulk_update(seats, ['row', 'number'], batch_size=500)
+
+    Movie.objects.filter(seat__isnull=False).update(seats_materialized=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0020_reservation_expires_at_reservation_is_expired_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='seats_materialized',
+            field=models.BooleanField(default=False, verbose_name='Seats Materialized'),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='number',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Number'),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='row',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Row'),
+        ),
+        migrations.RunPython(backfill_seat_positions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(fields=['movie', 'row', 'number'], name='reservation_movie_i_d5a914_idx'),
+        ),
+    ]
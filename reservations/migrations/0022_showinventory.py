@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0021_movie_seats_materialized_seat_number_seat_row_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShowInventory',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inventory', serialize=False, to='reservations.movie', verbose_name='Movie')),
+                ('num_rows', models.PositiveIntegerField(default=0, verbose_name='Number of Rows')),
+                ('seats_per_row', models.PositiveIntegerField(default=0, verbose_name='Seats per Row')),
+                ('occupancy', models.BinaryField(default=bytes, verbose_name='Occupancy')),
+                ('seats_free', models.PositiveIntegerField(default=0, verbose_name='Seats Free')),
+                ('next_hold_expiry', models.DateTimeField(blank=True, null=True, verbose_name='Next Hold Expiry')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0022_showinventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='showinventory',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Version'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0023_showinventory_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentVerification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_ref', models.CharField(max_length=100, unique=True, verbose_name='Transaction Reference')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('verifying', 'Verifying'), ('verified', 'Verified'), ('failed', 'Failed'), ('hold_lost', 'Hold Lost')], default='pending', max_length=20, verbose_name='Status')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Chapa Response')),
+                ('checked_at', models.DateTimeField(blank=True, null=True, verbose_name='Checked At')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_id',
+            field=models.CharField(db_index=True, max_length=100, verbose_name='Transaction ID'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0024_paymentverification_alter_transaction_transaction_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reservation',
+            name='qr_code',
+            field=models.ImageField(blank=True, null=True, upload_to='qrcodes/', verbose_name='QR Code'),
+        ),
+    ]
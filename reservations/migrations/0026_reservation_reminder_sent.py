@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0025_alter_reservation_qr_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='reminder_sent',
+            field=models.BooleanField(default=False, verbose_name='Reminder Sent'),
+        ),
+    ]
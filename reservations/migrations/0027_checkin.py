@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0026_reservation_reminder_sent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckIn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gate', models.CharField(blank=True, max_length=50, verbose_name='Gate')),
+                ('scanned_at', models.DateTimeField(verbose_name='Scanned At')),
+                ('batch', models.CharField(max_length=32, verbose_name='Batch')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reservations.movie', verbose_name='Movie')),
+                ('reservation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='reservations.reservation', verbose_name='Reservation')),
+            ],
+        ),
+    ]
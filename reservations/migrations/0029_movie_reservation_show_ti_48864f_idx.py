@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0028_movie_normalized_title'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['show_time', 'id'], name='reservation_show_ti_48864f_idx'),
+        ),
+    ]
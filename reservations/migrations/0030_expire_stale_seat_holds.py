@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def expire_stale_holds(apps, schema_editor):
+    # seats booked before holds had an expiry, for a checkout that was never paid, would stay taken forever.
+    # Give them (and their unpaid reservations) a hold that has already run out, so release_expired_holds frees them.
+    Seat = apps.get_model('reservations', 'Seat')
+    Reservation = apps.get_model('reservations', 'Reservation')
+    now = timezone.now()
+
+    paid_seats = Reservation.objects.filter(is_paid=True).values('seat_id')
+    Seat.objects.filter(is_booked=True, hold_expires_at__isnull=True).exclude(id__in=paid_seats).update(
+        hold_expires_at=now
+    )
+    Reservation.objects.filter(is_paid=False, is_expired=False, expires_at__isnull=True).update(expires_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0029_movie_reservation_show_ti_48864f_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(expire_stale_holds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0030_expire_stale_seat_holds'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movie',
+            name='seats_materialized',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Seats Materialized'),
+        ),
+    ]
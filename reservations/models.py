@@ -1,10 +1,15 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .tickets import sign_ticket, ticket_reference
+
 # our model defines the tables needed for our reservation flow: Movie → Seat → Reservation → Transaction
 
 class Movie(models.Model):
     title = models.CharField(_("Title"), max_length=100)
+    # the title as search sees it (search.normalize), filled in on save
+    normalized_title = models.CharField(_("Normalized Title"), max_length=100, blank=True, editable=False, db_index=True)
     description = models.TextField(_("Description"), blank=True)
     show_time = models.DateTimeField(_("Show Time"))
 
@@ -16,6 +21,13 @@ class Movie(models.Model):
 
     ticket_price = models.DecimalField(_("Ticket Price (ETB)"), max_digits=8, decimal_places=2, default=50.00)
 
+    # False until the show's Seat rows exist, see reservations.inventory
+    seats_materialized = models.BooleanField(_("Seats Materialized"), default=False, editable=False)
+
+    class Meta:
+        # the cinema listing pages through shows by (show_time, id), see cinema_reservation/pagination.py
+        indexes = [models.Index(fields=['show_time', 'id'])]
+
     # __str__ defines how an object is displayed as a string
     def str(self):
         return self.title
@@ -24,21 +36,77 @@ class Movie(models.Model):
 class Seat(models.Model):
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, verbose_name=_("Movie"))
     seat_number = models.CharField(_("Seat Number"), max_length=5)
+    # 1-based position in the hall, so ordering and lookups don't depend on the label string
+    row = models.PositiveSmallIntegerField(_("Row"), default=0)
+    number = models.PositiveSmallIntegerField(_("Number"), default=0)
     is_booked = models.BooleanField(_("Is Booked"), default=False)
+    # set while the seat is only held for an unpaid checkout, cleared once the payment is confirmed
+    hold_expires_at = models.DateTimeField(_("Hold Expires At"), null=True, blank=True, db_index=True)
+
+    # a seat whose hold has run out counts as free even before the reaper gets to it
+    @property
+    def is_taken(self):
+        if not self.is_booked:
+            return False
+        return self.hold_expires_at is None or self.hold_expires_at > timezone.now()
+
+    class Meta:
+        indexes = [models.Index(fields=['movie', 'row', 'number'])]
 
     def __str__(self):
         return f"{self.movie.title} - {self.seat_number}"
 
 
+# our show inventory keeps a compact picture of a show's seats in a single row, so the seat map and listings
+# can answer "which seats are free" and "how many are left" without loading every Seat
+class ShowInventory(models.Model):
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE, primary_key=True, related_name='inventory', verbose_name=_("Movie"))
+    num_rows = models.PositiveIntegerField(_("Number of Rows"), default=0)
+    seats_per_row = models.PositiveIntegerField(_("Seats per Row"), default=0)
+    # one bit per seat in row-major order, a set bit means the seat is booked or held
+    occupancy = models.BinaryField(_("Occupancy"), default=bytes)
+    seats_free = models.PositiveIntegerField(_("Seats Free"), default=0)
+    # earliest hold in the bitmap that will lapse; once it has passed the bitmap is rebuilt before it is read
+    next_hold_expiry = models.DateTimeField(_("Next Hold Expiry"), null=True, blank=True)
+    # bumped on every change, clients use it as the seat map's ETag
+    version = models.PositiveBigIntegerField(_("Version"), default=0)
+
+    def seat_index(self, row, number):
+        if 1 <= row <= self.num_rows and 1 <= number <= self.seats_per_row:
+            return (row - 1) * self.seats_per_row + (number - 1)
+        return None
+
+    def is_taken(self, row, number):
+        index = self.seat_index(row, number)
+        if index is None:
+            return True
+        return bool(bytes(self.occupancy)[index >> 3] & (1 << (index & 7)))
+
+    def __str__(self):
+        return f"{self.movie_id} - {self.seats_free} free"
+
+
 class Reservation(models.Model):
     user = models.CharField(_("User"), max_length=100)
     email = models.EmailField(_("Email"), default="default@example.com")
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, verbose_name=_("Movie"))
     seat = models.ForeignKey(Seat, on_delete=models.CASCADE, verbose_name=_("Seat"))
     reservation_time = models.DateTimeField(_("Reservation Time"), auto_now_add=True)
-    qr_code = models.ImageField(_("QR Code"), upload_to='qrcodes/', blank=True)
+    # only older tickets have a stored PNG, new ones are rendered on request by the ticket_qr view
+    qr_code = models.ImageField(_("QR Code"), upload_to='qrcodes/', blank=True, null=True)
     is_paid = models.BooleanField(_("Is Paid"), default=False)
     email_sent = models.BooleanField(_("Email Sent"), default=False)
+    reminder_sent = models.BooleanField(_("Reminder Sent"), default=False)
+    expires_at = models.DateTimeField(_("Expires At"), null=True, blank=True, db_index=True)
+    is_expired = models.BooleanField(_("Is Expired"), default=False)
+
+    def qr_payload(self):
+        # what the ticket's QR code encodes: a signed token the gate can check without the database
+        return sign_ticket(self.id, self.movie_id, self.seat.seat_number)
+
+    def reference(self):
+        # what the ticket page and QR code URLs use instead of the id
+        return ticket_reference(self.id)
 
     def __str__(self):
         return f"{self.user} - {self.movie.title} - {self.seat.seat_number}"
@@ -46,7 +114,7 @@ class Reservation(models.Model):
 
 class Transaction(models.Model):
     reservation = models.OneToOneField(Reservation, on_delete=models.CASCADE, verbose_name=_("Reservation"))
-    transaction_id = models.CharField(_("Transaction ID"), max_length=100)
+    transaction_id = models.CharField(_("Transaction ID"), max_length=100, db_index=True)
     amount = models.DecimalField(_("Amount"), max_digits=8, decimal_places=2)
     status = models.CharField(_("Status"), max_length=20)
     created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
@@ -55,3 +123,40 @@ class Transaction(models.Model):
         return f"{self.transaction_id} - {self.status}"
 
 
+# one row per ticket let in at the door. The unique reservation makes the first scan win,
+# every later scan of the same ticket is a duplicate, see reservations.checkin
+class CheckIn(models.Model):
+    reservation = models.OneToOneField(Reservation, on_delete=models.CASCADE, verbose_name=_("Reservation"))
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, verbose_name=_("Movie"))
+    gate = models.CharField(_("Gate"), max_length=50, blank=True)
+    scanned_at = models.DateTimeField(_("Scanned At"))
+    # the sync batch that wrote this row, tells a batch which of its scans got in first
+    batch = models.CharField(_("Batch"), max_length=32)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.reservation_id} @ {self.gate} - {self.scanned_at}"
+
+
+# one row per tx_ref: Chapa is asked about a payment once and every later hit reads the stored answer,
+# see reservations.payments
+class PaymentVerification(models.Model):
+    STATUS_CHOICES = [
+        ('pending', _("Pending")),
+        ('verifying', _("Verifying")),
+        ('verified', _("Verified")),
+        ('failed', _("Failed")),
+        # paid, but the seat hold had expired and the seat went to someone else
+        ('hold_lost', _("Hold Lost")),
+    ]
+
+    tx_ref = models.CharField(_("Transaction Reference"), max_length=100, unique=True)
+    status = models.CharField(_("Status"), max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(_("Chapa Response"), null=True, blank=True)
+    checked_at = models.DateTimeField(_("Checked At"), null=True, blank=True)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.tx_ref} - {self.status}"
+
+
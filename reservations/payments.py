@@ -0,0 +1,107 @@
+# our payments module makes sure every Chapa payment is verified, and turned into a ticket, exactly once.
+# The return pages and Chapa's callback/webhook all go through verify_once(): the first hit claims the tx_ref's
+# PaymentVerification row with a conditional UPDATE and asks Chapa, every other hit just reads what it stored.
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from cinema_reservation import chapa
+from jobs.queue import enqueue
+from . import booking
+from .models import PaymentVerification, Transaction
+
+# a claim older than this belongs to a request that died half way, so another hit may take it over
+CLAIM_TIMEOUT = timedelta(seconds=60)
+# a payment Chapa reported as failed is asked about again at most this often
+FAILED_RECHECK = timedelta(seconds=30)
+# transaction statuses in Chapa's verify answer that mean the payment did not go through
+FAILED_STATUSES = ['failed', 'cancelled']
+# how long a hit that lost the claim waits for the winner before showing what is stored so far
+WAIT_SECONDS = 5
+WAIT_INTERVAL = 0.25
+
+
+def claim(tx_ref, now=None):
+    # True for the one caller that gets to ask Chapa about this tx_ref
+    now = now or timezone.now()
+    PaymentVerification.objects.get_or_create(tx_ref=tx_ref)
+    return bool(PaymentVerification.objects.filter(
+        Q(status='pending')
+        | Q(status='verifying', checked_at__lte=now - CLAIM_TIMEOUT)
+        | Q(status='failed', checked_at__lte=now - FAILED_RECHECK),
+        tx_ref=tx_ref,
+    ).update(status='verifying', checked_at=now))
+
+
+def release(tx_ref):
+    # Chapa could not be reached or we failed half way, let the next hit try again
+    PaymentVerification.objects.filter(tx_ref=tx_ref, status='verifying').update(status='pending')
+
+
+def outcome(result):
+    # what Chapa's verify answer means for us: 'verified', 'failed', or 'pending' (not paid yet, or an answer
+    # we can't read, so it is asked about again). Only an explicit failure or "not found" fails a payment.
+    if chapa.is_verified(result):
+        return 'verified'
+    data = result.get('data') or {}
+    if not isinstance(data, dict):
+        return 'pending'
+    if data.get('status') in FAILED_STATUSES:
+        return 'failed'
+    if result.get('status') == 'failed' and not data:
+        return 'failed'  # no such transaction at Chapa (verify only lets 200/400/404 answers through)
+    return 'pending'
+
+
+def record(tx_ref, result):
+    """
+    Store Chapa's answer for tx_ref. A successful payment confirms the booking and sends the ticket.
+    Only the caller holding the claim may call this. Returns the new status.
+    """
+    status = outcome(result)
+    if status == 'verified':
+        transaction = Transaction.objects.select_related('reservation__movie', 'reservation__seat').get(transaction_id=tx_ref)
+        reservation = transaction.reservation
+        # confirm_reservation fails if the hold ran out and the seat was sold to someone else.
+        # The QR code and email are left to the job worker, so the return page does not wait on SMTP.
+        with db_transaction.atomic():
+            if reservation.is_paid or booking.confirm_reservation(reservation):
+                enqueue('reservations.issue_ticket', reservation_id=reservation.id)
+            else:
+                status = 'hold_lost'
+    elif status == 'failed':
+        Transaction.objects.filter(transaction_id=tx_ref, status__in=['pending', 'expired']).update(status='failed')
+    # a 'pending' answer means the buyer has not finished paying yet, the next hit asks again
+
+    PaymentVerification.objects.filter(tx_ref=tx_ref).update(status=status, result=result, checked_at=timezone.now())
+    return status
+
+
+async def verify_once(tx_ref):
+    """
+    Return the PaymentVerification for tx_ref, asking Chapa only if nobody has asked yet (or a recheck is due).
+    Returns None for a tx_ref we never issued and raises chapa.ChapaError when Chapa cannot be reached.
+    """
+    if not await Transaction.objects.filter(transaction_id=tx_ref).aexists():
+        return None
+
+    if await sync_to_async(claim)(tx_ref):
+        try:
+            result = await chapa.averify_payment(tx_ref)
+            await sync_to_async(record)(tx_ref, result)
+        except Exception:
+            await sync_to_async(release)(tx_ref)
+            raise
+    else:
+        # someone else is asking Chapa about it right now, give them a moment to finish
+        for attempt in range(int(WAIT_SECONDS / WAIT_INTERVAL)):
+            status = await PaymentVerification.objects.filter(tx_ref=tx_ref).values_list('status', flat=True).aget()
+            if status != 'verifying':
+                break
+            await asyncio.sleep(WAIT_INTERVAL)
+
+    return await PaymentVerification.objects.aget(tx_ref=tx_ref)
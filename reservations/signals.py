@@ -1,22 +1,47 @@
 #post_save → signal triggered after a model instance is saved
 #receiver → decorator that connects a function to a signal
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.utils.translation import gettext_lazy as _
-from .models import Movie, Seat
+from .models import Movie
+from streaming.models import StreamingContent
+from cinema_reservation import pagecache
+from .inventory import materialize_seats, reconcile_seats
+
+# remembers the hall size before an edit so post_save can tell whether the seats need reconciling
+@receiver(pre_save, sender=Movie)
+def remember_hall_size(sender, instance, **kwargs):
+    instance._previous_hall_size = None
+    if instance.pk:
+        instance._previous_hall_size = (
+            Movie.objects.filter(pk=instance.pk).values_list('num_rows', 'seats_per_row').first()
+        )
 
 # our signals help auto create (seats in this case) when a model instance is saved
 @receiver(post_save, sender=Movie)
 def create_custom_seats(sender, instance, created, **kwargs):
     if created:
-        for row_num in range(instance.num_rows):
-            row_letter = chr(65 + row_num)  # 'A', 'B', 'C'...
-            for seat_num in range(1, instance.seats_per_row + 1):
-                # Seat label format translatable if needed
-                seat_label = _(f"{row_letter}{seat_num}")  
-                Seat.objects.create(
-                    movie=instance,
-                    seat_number=seat_label,
-                    is_booked=False
-                )
-                
+        # with SEAT_INVENTORY_LAZY the seats are created on the first seat-map request instead
+        if not settings.SEAT_INVENTORY_LAZY:
+            materialize_seats(instance)
+        return
+
+    previous = getattr(instance, '_previous_hall_size', None)
+    if instance.seats_materialized and previous and previous != (instance.num_rows, instance.seats_per_row):
+        reconcile_seats(instance)
+
+
+# our cached pages (cinema_reservation/pagecache.py) are re-rendered after any change to what they list
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def invalidate_movie_pages(sender, **kwargs):
+    db_transaction.on_commit(lambda: pagecache.invalidate('movies'))
+
+
+@receiver(post_save, sender=StreamingContent)
+@receiver(post_delete, sender=StreamingContent)
+def invalidate_streaming_pages(sender, update_fields=None, **kwargs):
+    # playback keeps saving the play counts, which no cached page shows
+    if not StreamingContent.is_stats_update(update_fields):
+        db_transaction.on_commit(lambda: pagecache.invalidate('streaming'))
@@ -0,0 +1,53 @@
+# our background tasks for the reservation app, run by the jobs worker (python manage.py run_jobs)
+from django.core.mail import EmailMessage
+from django.db import transaction as db_transaction
+from django.utils.translation import gettext_lazy as _
+
+from cinema_reservation import qr
+from jobs.mail import queue_email
+from jobs.queue import task
+from .models import Reservation
+
+
+@task('reservations.issue_ticket')
+def issue_ticket(reservation_id):
+    # queues the confirmation email once per reservation, with the QR code rendered from the ticket payload
+    reservation = Reservation.objects.select_related('movie', 'seat').filter(id=reservation_id).first()
+    if reservation is None or reservation.email_sent:
+        return  # deleted (e.g. with its show) before the worker got to it, or already mailed
+
+    subject = _("🎟 Your Cinema Ticket Confirmation | 🎟 የሲኒማ ትኬት ማረጋገጫ")
+    message = _(f"""
+Hello {reservation.user},
+
+✅ Your payment for '{reservation.movie.title}' has been confirmed.
+
+🎫 Seat: {reservation.seat.seat_number}
+📍 Movie: {reservation.movie.title}
+
+Please show the attached QR code at the entrance.
+
+Enjoy your show!
+
+
+------------------------------
+🇪🇹 አማርኛ ማረጋገጫ
+------------------------------
+
+ሰላም {reservation.user},
+
+✅ ለ '{reservation.movie.title}' የክፍያዎ ማረጋገጫ ተሳክቷል።
+
+🎫 መቀመጫ: {reservation.seat.seat_number}
+📍 ፊልም: {reservation.movie.title}
+
+እባክዎ ከተያያዘው የQR ኮድ ጋር በመግቢያ ቦታ ያሳዩ።
+
+ደስታ ይሁን በተመልከቱበት።
+""")
+
+    email = EmailMessage(subject, message, to=[reservation.email])
+    email.attach(f"ticket_qr_{reservation.id}.png", qr.render(reservation.qr_payload()), 'image/png')
+    with db_transaction.atomic():
+        if Reservation.objects.filter(id=reservation.id, email_sent=False).update(email_sent=True):
+            queue_email(email)
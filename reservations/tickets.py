@@ -0,0 +1,54 @@
+# our ticket tokens: the QR code on a ticket carries "<reservation id>.<show id>.<seat>.<signature>", signed with
+# TICKET_SIGNING_SECRET. The gate checks the signature alone, so validating a scan needs no database lookup
+# and a ticket cannot be forged or edited (another seat or show) without the secret.
+import base64
+import hashlib
+import hmac
+
+from django.conf import settings
+
+# 16 bytes of HMAC-SHA256 is plenty for tickets and keeps the QR code small
+SIGNATURE_BYTES = 16
+
+
+def same_signature(expected, given):
+    # compared as bytes: compare_digest raises TypeError for non-ASCII str, and scans and URLs can carry anything
+    return hmac.compare_digest(expected.encode(), given.encode('utf-8', 'replace'))
+
+
+def signature(data):
+    digest = hmac.new(settings.TICKET_SIGNING_SECRET.encode(), data.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:SIGNATURE_BYTES]).decode('ascii').rstrip('=')
+
+
+def sign_ticket(reservation_id, movie_id, seat_number):
+    data = f"{reservation_id}.{movie_id}.{seat_number}"
+    return f"{data}.{signature(data)}"
+
+
+def ticket_reference(reservation_id):
+    # "<reservation id>.<signature>", used in the ticket page and QR code URLs so tickets can't be fetched by counting ids
+    return f"{reservation_id}.{signature(f'ref.{reservation_id}')}"
+
+
+def read_reference(reference):
+    # the reservation id of a ticket reference, None if it was not signed by us
+    reservation_id, _, sig = (reference or '').partition('.')
+    if not reservation_id.isdigit() or not same_signature(signature(f'ref.{reservation_id}'), sig):
+        return None
+    return int(reservation_id)
+
+
+def verify_ticket(token):
+    """
+    Check a scanned ticket token. Returns {'reservation': id, 'movie': id, 'seat': seat_number}
+    if the signature is good, None otherwise.
+    """
+    data, _, sig = (token or '').strip().rpartition('.')
+    parts = data.split('.', 2)
+    if len(parts) != 3 or not same_signature(signature(data), sig):
+        return None
+    reservation_id, movie_id, seat_number = parts
+    if not (reservation_id.isdigit() and movie_id.isdigit()):
+        return None
+    return {'reservation': int(reservation_id), 'movie': int(movie_id), 'seat': seat_number}
@@ -6,10 +6,17 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('movie/<int:movie_id>/seats/', views.seat_selection, name='seat_selection'),
-    path('ticket/<int:ticket_id>/', views.ticket_confirmation, name='ticket_confirmation'),
+    path('movie/<int:movie_id>/seats.json', views.seat_map_api, name='seat_map_api'),
+    path('movie/<int:movie_id>/seats/events/', views.seat_events, name='seat_events'),
+    path('ticket/<str:reference>/', views.ticket_confirmation, name='ticket_confirmation'),
+    path('ticket/<str:reference>/qr.png', views.ticket_qr, name='ticket_qr'),
+    path('gate/validate/', views.gate_validate, name='gate_validate'),
+    path('gate/<int:movie_id>/open/', views.gate_open, name='gate_open'),
+    path('gate/<int:movie_id>/sync/', views.gate_sync, name='gate_sync'),
     path('payment/success/', views.payment_success, name='payment_success'),
     path('payment/cancel/', views.payment_cancel, name='payment_cancel'),
     path('payment/verify/', views.payment_verify, name='payment_verify'),
+    path('payment/webhook/', views.payment_webhook, name='payment_webhook'),
 
     # Admin URLs
    
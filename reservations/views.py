@@ -12,19 +12,24 @@ from django.conf import settings
 from django.http import HttpResponse
 from django.utils.translation import gettext_lazy as _
 from streaming.models import StreamingContent
+from search import index as search_index
+from cinema_reservation.pagination import BadCursor, keyset_page
+from cinema_reservation.pagecache import cached_page
 
 
+@cached_page('movies', 'streaming')
 def home(request):
     query = request.GET.get('q')
 
-    # search query for cinema and events
+    # search query for cinema and events, one full-text query over both shows and streaming titles, best match first
     if query:
-        movies = Movie.objects.filter(title__icontains=query)
+        found = search_index.find(query)
+        movies = found['movie']
+        featured_streaming = found['streaming'][:6]
     else:
-        movies = Movie.objects.all()
-
-    # featured streaming content fetches at least six streaming contents on the home
-    featured_streaming = StreamingContent.objects.order_by('-release_date')[:6]  
+        movies = keyset_page(Movie.objects.all(), ('show_time', 'id'), size=6)[0]
+        # featured streaming content fetches at least six streaming contents on the home
+        featured_streaming = StreamingContent.objects.order_by('-release_date')[:6]
 
     #renders the home.html template and passes context
     return render(request, 'reservations/home.html', {
@@ -46,103 +51,150 @@ import requests
 
 
 import uuid  
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
+from . import booking, payments
+from cinema_reservation import chapa
+from .inventory import materialize_seats, get_occupancy, seat_map
 
-def seat_selection(request, movie_id):
-    # fetches the movie by movie_id, returns 404 if it doesn’t exist, fetches all seats for that movie and orders them by seat number for display
-    movie = get_object_or_404(Movie, id=movie_id)
-    seats = Seat.objects.filter(movie=movie).order_by('seat_number')
 
-    # handles form submission and extracts the seat chosen by the user, their name, and email
+def render_seat_selection(request, movie, **context):
+    # sync on purpose: reads the bitmap and renders the template (which may touch the session) off the event loop
+    return render(request, 'reservations/seat_selection.html', {
+        'movie': movie,
+        'seat_rows': seat_map(get_occupancy(movie)),
+        **context
+    })
+
+
+async def seat_selection(request, movie_id):
+    # fetches the movie by movie_id, returns 404 if it doesn’t exist. The seat map itself is drawn from the
+    # show's occupancy bitmap (one row) instead of loading every Seat.
+    # async so that waiting on Chapa does not hold a worker; the short database work runs via sync_to_async.
+    movie = await aget_object_or_404(Movie, id=movie_id)
+    if not movie.seats_materialized:
+        # shows created with SEAT_INVENTORY_LAZY get their seats on the first visit
+        await sync_to_async(materialize_seats)(movie)
+
+    # handles form submission and extracts the seat chosen by the user ("row-number"), their name, and email
     if request.method == "POST":
-        seat_id = request.POST.get('seat_id')
+        seat = request.POST.get('seat', '')
         name = request.POST.get('name')
         email = request.POST.get('email')
         amount = float(movie.ticket_price)  
 
         try:
-            # select_for_update() locks the seat row for this transaction to prevent double booking. 
-            # If the seat is already booked, it returns an error.
-            seat = Seat.objects.select_for_update().get(id=seat_id, movie=movie)
-
-            if seat.is_booked:
-                return render(request, 'reservations/seat_selection.html', {
-                    'movie': movie,
-                    'seats': seats,
-                    'error': _('Seat already booked.')
-                })
-
-            # temporarily marks the seat as booked in the database before payment
-            seat.is_booked = True
-            seat.save()
-
-            # creates a reservation record with is_paid=False
-            reservation = Reservation.objects.create(
-                movie=movie,
-                seat=seat,
-                user=name,
-                email=email,
-                is_paid=False
+            row, number = (int(part) for part in seat.split('-'))
+            # claims the seat with a conditional UPDATE and creates the pending reservation + transaction
+            # in one short database transaction. No lock is held while we call Chapa below.
+            reservation, tx_ref = await sync_to_async(booking.reserve_seat)(movie, row, number, name, email, amount)
+        except booking.SeatUnavailable:
+            return await sync_to_async(render_seat_selection)(request, movie, error=_('Seat already booked.'))
+        except (Seat.DoesNotExist, ValueError):
+            return await sync_to_async(render_seat_selection)(request, movie, error=_('Invalid seat.'))
+
+        chapa_data = {
+            "amount": str(amount),
+            "currency": "ETB",
+            "email": email,
+            "first_name": name,
+            "tx_ref": tx_ref,
+            "callback_url": request.build_absolute_uri("/payment/webhook/"),
+            "return_url": request.build_absolute_uri(f"/payment/success/?tx_ref={tx_ref}"),
+            "customization[title]": str(_(f"Ticket for {movie.title}")),
+            "customization[description]": str(_("Cinema seat booking")),
+        }
+
+        try:
+            response_data = await chapa.ainitialize_payment(chapa_data)
+        except chapa.ChapaError:
+            await sync_to_async(booking.release_reservation)(reservation)
+            return await sync_to_async(render_seat_selection)(
+                request, movie, error=_('Payment initialization failed. Try again.')
             )
 
-            # ✅ Generate a unique transaction reference with UUID
-            tx_ref = f"reservation_{reservation.id}_{uuid.uuid4().hex[:8]}"
+        return redirect(response_data["data"]["checkout_url"])
 
-            # creates a transaction record linked to the reservation.
-            Transaction.objects.create(
-                reservation=reservation,
-                transaction_id=tx_ref,
-                amount=amount,
-                status='pending'
-            )
+    return await sync_to_async(render_seat_selection)(
+        request, movie, ticket_price=movie.ticket_price  # Pass to template
+    )
 
-            chapa_data = {
-                "amount": str(amount),
-                "currency": "ETB",
-                "email": email,
-                "first_name": name,
-                "tx_ref": tx_ref,
-                "callback_url": request.build_absolute_uri("/payment/verify/"),
-                "return_url": request.build_absolute_uri(f"/payment/success/?tx_ref={tx_ref}"),
-                "customization[title]": str(_(f"Ticket for {movie.title}")),
-                "customization[description]": str(_("Cinema seat booking")),
-            }
-
-            headers = {
-                "Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}",
-                "Content-Type": "application/json"
-            }
-
-            chapa_response = requests.post(settings.CHAPA_BASE_URL, json=chapa_data, headers=headers)
-            response_data = chapa_response.json()
-
-            # Debugging logs
-            print("Chapa Status Code:", chapa_response.status_code)
-            print("Chapa Response Data:", response_data)
-
-            if chapa_response.status_code == 200 and response_data.get("status") == "success":
-                return redirect(response_data["data"]["checkout_url"])
-            else:
-                seat.is_booked = False
-                seat.save()
-                reservation.delete()
-                return render(request, 'reservations/seat_selection.html', {
-                    'movie': movie,
-                    'seats': seats,
-                    'error': _('Payment initialization failed. Try again.')
-                })
-
-        except Seat.DoesNotExist:
-            return render(request, 'reservations/seat_selection.html', {
-                'movie': movie,
-                'seats': seats,
-                'error': _('Invalid seat.')
-            })
 
-    return render(request, 'reservations/seat_selection.html', {
-        'movie': movie,
-        'seats': seats,
-        'ticket_price': movie.ticket_price  # Pass to template
+import base64
+from django.http import JsonResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
+from .models import ShowInventory
+
+def seat_map_api(request, movie_id):
+    # lightweight seat map for polling: the inventory version is the ETag, so an unchanged poll is answered
+    # with 304 after reading two columns of one row
+    inventory_state = ShowInventory.objects.filter(movie_id=movie_id).values_list('version', 'next_hold_expiry').first()
+    now = timezone.now()
+    if inventory_state:
+        version, next_hold_expiry = inventory_state
+        etag = f'"{version}"'
+        # a lapsed hold means the stored bitmap is stale, so it must be rebuilt before we can say "not modified"
+        if (next_hold_expiry is None or next_hold_expiry > now) and etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+    movie = get_object_or_404(Movie, id=movie_id)
+    if not movie.seats_materialized:
+        materialize_seats(movie)
+    inventory = get_occupancy(movie, now)
+
+    response = JsonResponse({
+        'version': inventory.version,
+        'num_rows': inventory.num_rows,
+        'seats_per_row': inventory.seats_per_row,
+        'seats_free': inventory.seats_free,
+        # one bit per seat, row-major, least significant bit first; a set bit means taken
+        'occupancy': base64.b64encode(bytes(inventory.occupancy)).decode('ascii'),
     })
+    response['ETag'] = f'"{inventory.version}"'
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+import asyncio
+import json
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from .events import broker
+
+SEAT_EVENTS_KEEPALIVE_SECONDS = 15
+
+async def seat_events(request, movie_id):
+    # pushes held/booked/released events for one show as Server-Sent Events. Only worth it under asgi.py:
+    # under WSGI an open stream would pin a worker, so we answer 204 and the page keeps polling seats.json
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    if not await Movie.objects.filter(id=movie_id).aexists():
+        raise Http404
+
+    listener = broker.subscribe(movie_id)
+    queue = listener[1]
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SEAT_EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(movie_id, listener)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 import requests
 from django.conf import settings
@@ -154,105 +206,70 @@ import qrcode
 from .models import Transaction
 
 
-def payment_success(request):
+async def payment_success(request):
+    # Chapa's return URL. Reloads are cheap: Chapa is asked once per tx_ref and the answer is stored,
+    # see reservations.payments
     tx_ref = request.GET.get("tx_ref")
     if not tx_ref:
-        return render(request, "reservations/payment_failed.html", {
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {
             "error": _("Transaction reference missing.")
         })
 
-    url = f"https://api.chapa.co/v1/transaction/verify/{tx_ref}"
-    headers = {"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
-
     try:
-        response = requests.get(url, headers=headers, timeout=30)  # timeout
-        response.raise_for_status()
-        chapa_data = response.json()
-    except requests.exceptions.Timeout:
-        return render(request, "reservations/payment_failed.html", {
+        verification = await payments.verify_once(tx_ref)
+    except chapa.ChapaTimeout:
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {
             "error": _("Payment verification timed out. Please try again.")
         })
-    except requests.exceptions.RequestException as e:
-        return render(request, "reservations/payment_failed.html", {
+    except chapa.ChapaError as e:
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {
             "error": _("Could not verify payment: ") + str(e)
         })
 
-    if chapa_data.get("status") != "success":
-        return render(request, "reservations/payment_failed.html", {
-            "error": _("Payment verification failed.")
-        })
-
-    try:
-        transaction = Transaction.objects.get(transaction_id=tx_ref)
-        reservation = transaction.reservation
-    except Transaction.DoesNotExist:
-        return render(request, "reservations/payment_failed.html", {
+    if verification is None:
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {
             "error": _("Transaction not found.")
         })
+    if verification.status != 'verified':
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {
+            "error": payment_status_error(verification)
+        })
 
-    if not reservation.is_paid:
-        reservation.is_paid = True
-        reservation.save()
-
-        transaction.status = "success"
-        transaction.save()
-
-        # Generate QR Code
-        qr = qrcode.make(_(f"Reservation ID: {reservation.id} - Seat: {reservation.seat.seat_number}"))
-        buffer = BytesIO()
-        qr.save(buffer, format="PNG")
-        reservation.qr_code.save(f"qr_{reservation.id}.png", ContentFile(buffer.getvalue()))
-        buffer.close()
-
-    # Send confirmation email (only once)
-    if not reservation.email_sent:
-        subject = _("🎟 Your Cinema Ticket Confirmation | 🎟 የሲኒማ ትኬት ማረጋገጫ")
-
-        message = _(f"""
-Hello {reservation.user},
-
-✅ Your payment for '{reservation.movie.title}' has been confirmed.
-
-🎫 Seat: {reservation.seat.seat_number}
-📍 Movie: {reservation.movie.title}
-
-Please show the attached QR code at the entrance.
-
-Enjoy your show!
-
-
-------------------------------
-------------------------------
-
-ሰላም {reservation.user},
-
-✅ ለ '{reservation.movie.title}' የክፍያዎ ማረጋገጫ ተሳክቷል።
-
-🎫 መቀመጫ: {reservation.seat.seat_number}  
-📍 ፊልም: {reservation.movie.title}  
+    reservation = await Reservation.objects.select_related('movie', 'seat').aget(transaction__transaction_id=tx_ref)
+    return await sync_to_async(render)(request, "reservations/payment_success.html", {
+        "reservation": reservation,
+        "qr_url": reverse('ticket_qr', args=[reservation.reference()]),
+    })
 
-እባክዎ ከተያያዘው የQR ኮድ ጋር በመግቢያ ቦታ ያሳዩ።  
 
-ደስታ ይሁን በተመልከቱበት።
-""")
+def payment_status_error(verification):
+    if verification.status == 'hold_lost':
+        return _("Your seat hold expired before the payment was confirmed. Please contact us for a refund.")
+    if verification.status in ('pending', 'verifying'):
+        return _("Your payment is still being confirmed. Please refresh this page in a moment.")
+    return _("Payment verification failed.")
 
-        email_msg = EmailMessage(subject, message, to=[reservation.email])
-        if reservation.qr_code:
-            email_msg.attach(f"ticket_qr_{reservation.id}.png", reservation.qr_code.read(), "image/png")
-        email_msg.send()
 
-        reservation.email_sent = True
-        reservation.save()
+from django.urls import reverse
+from cinema_reservation import qr
+from .tickets import read_reference, ticket_reference
 
-    return render(request, "reservations/payment_success.html", {
-        "reservation": reservation,
-        "qr_url": reservation.qr_code.url if reservation.qr_code else None,
-    })
+def ticket_qr(request, reference):
+    # the ticket's QR code, rendered from its payload (cached in memory), ?format=svg for SVG.
+    # The QR code gets you in at the gate, so it is only found through the ticket's signed reference
+    reservation_id = read_reference(reference)
+    if reservation_id is None:
+        raise Http404
+    reservation = get_object_or_404(Reservation.objects.select_related('movie', 'seat'), id=reservation_id, is_paid=True)
+    return qr.qr_response(request, reservation.qr_payload(), request.GET.get('format', 'png'), private=True)
 
 
 # Ticket confirmation page
-def ticket_confirmation(request, ticket_id):
-    reservation = get_object_or_404(Reservation, id=ticket_id)
+def ticket_confirmation(request, reference):
+    reservation_id = read_reference(reference)
+    if reservation_id is None:
+        raise Http404
+    reservation = get_object_or_404(Reservation, id=reservation_id)
     if not reservation.is_paid:
         return HttpResponse(_("Ticket is not paid yet. Please complete payment to access."))
     return render(request, 'reservations/ticket_confirmation.html', {
@@ -275,85 +292,116 @@ from django.contrib import messages
 from django.core.files.base import ContentFile
 
 
-def payment_verify(request):
+async def payment_verify(request):
     tx_ref = request.GET.get('tx_ref')
     if not tx_ref:
-        return render(request, "reservations/payment_failed.html", {"error": _("Missing tx_ref.")})
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {"error": _("Missing tx_ref.")})
 
     try:
-        transaction = Transaction.objects.get(transaction_id=tx_ref)
-        reservation = transaction.reservation
-    except Transaction.DoesNotExist:
-        return render(request, "reservations/payment_failed.html", {"error": _("Transaction not found.")})
-
-    # Check if already verified
-    if reservation.is_paid:
-        return redirect('ticket_confirmation', reservation_id=reservation.id)
-
-    headers = {
-        "Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"
-    }
-
-    verify_url = f"https://api.chapa.co/v1/transaction/verify/{tx_ref}"
-    response = requests.get(verify_url, headers=headers)
-    result = response.json()
-
-    if result.get("status") == "success" and result["data"]["status"] == "success":
-        # Update reservation and transaction
-        reservation.is_paid = True
-
-        # Generate QR code
-        qr = qrcode.make(_(f"Reservation ID: {reservation.id}, Seat: {reservation.seat.seat_number}, Movie: {reservation.movie.title}"))
-        buffer = BytesIO()
-        qr.save(buffer)
-        filename = f"ticket_qr_{reservation.id}.png"
-        reservation.qr_code.save(filename, ContentFile(buffer.getvalue()), save=False)
-        reservation.save()
-
-        transaction.status = "success"
-        transaction.save()
-
-        # Send confirmation email with QR
-        subject = _("🎟 Your Cinema Ticket Confirmation | 🎟 የሲኒማ ትኬት ማረጋገጫ")
-        message = _(f"""
-Hello {reservation.user},
-
-✅ Your payment for '{reservation.movie.title}' has been confirmed.
-
-🎫 Seat: {reservation.seat.seat_number}
-📍 Movie: {reservation.movie.title}
-
-Please show the attached QR code at the entrance.
-
-Enjoy your show!
-
-
-------------------------------
-🇪🇹 አማርኛ ማረጋገጫ
-------------------------------
-
-ሰላም {reservation.user},
-
-✅ ለ '{reservation.movie.title}' የክፍያዎ ማረጋገጫ ተሳክቷል።
-
-🎫 መቀመጫ: {reservation.seat.seat_number}  
-📍 ፊልም: {reservation.movie.title}  
-
-እባክዎ ከተያያዘው የQR ኮድ ጋር በመግቢያ ቦታ ያሳዩ።  
-
-ደስታ ይሁን በተመልከቱበት።
-""")
-
-        email = EmailMessage(subject, message, to=[reservation.email])
-        email.attach(filename, buffer.getvalue(), 'image/png')
-        email.send()
-
-        return redirect('ticket_confirmation', reservation_id=reservation.id)
-
+        verification = await payments.verify_once(tx_ref)
+    except chapa.ChapaError:
+        # nothing is stored, Chapa's callback or the next visit will try again
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {"error": _("Could not verify payment. Please try again.")})
+
+    if verification is None:
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {"error": _("Transaction not found.")})
+    if verification.status != 'verified':
+        return await sync_to_async(render)(request, "reservations/payment_failed.html", {"error": payment_status_error(verification)})
+
+    reservation_id = await Reservation.objects.filter(transaction__transaction_id=tx_ref).values_list('id', flat=True).aget()
+    return redirect('ticket_confirmation', reference=ticket_reference(reservation_id))
+
+
+import hashlib
+import hmac
+from django.views.decorators.csrf import csrf_exempt
+
+@csrf_exempt
+async def payment_webhook(request):
+    # Chapa's callback (GET ?trx_ref=...) and its webhook (POST JSON) both land here. Their payload is only
+    # a hint: the payment is always checked with Chapa's verify API, once per tx_ref, so duplicate
+    # deliveries cost one indexed read.
+    if request.method == 'POST':
+        if settings.CHAPA_WEBHOOK_SECRET and not valid_chapa_signature(request):
+            return JsonResponse({'error': 'invalid signature'}, status=403)
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'invalid payload'}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({'error': 'invalid payload'}, status=400)
+        tx_ref = payload.get('tx_ref') or payload.get('trx_ref')
     else:
-        transaction.status = "failed"
-        transaction.save()
-        return render(request, "reservations/payment_failed.html", {"error": _("Payment verification failed.")})
+        tx_ref = request.GET.get('trx_ref') or request.GET.get('tx_ref')
+    if not tx_ref or not isinstance(tx_ref, str):
+        return JsonResponse({'error': 'missing tx_ref'}, status=400)
+
+    try:
+        verification = await payments.verify_once(tx_ref)
+    except chapa.ChapaError:
+        # a non-2xx answer makes Chapa deliver the webhook again later
+        return JsonResponse({'error': 'verification unavailable'}, status=503)
+    if verification is None:
+        return JsonResponse({'error': 'unknown tx_ref'}, status=404)
+    return JsonResponse({'tx_ref': tx_ref, 'status': verification.status})
+
+
+def valid_chapa_signature(request):
+    # Chapa signs the body with the webhook secret (x-chapa-signature) and the secret with itself (chapa-signature)
+    secret = settings.CHAPA_WEBHOOK_SECRET.encode()
+    expected = [
+        (request.headers.get('x-chapa-signature', ''), hmac.new(secret, request.body, hashlib.sha256).hexdigest()),
+        (request.headers.get('chapa-signature', ''), hmac.new(secret, secret, hashlib.sha256).hexdigest()),
+    ]
+    # compared as bytes: compare_digest refuses non-ASCII str, and a header can carry anything
+    return any(given and hmac.compare_digest(given.encode(), digest.encode()) for given, digest in expected)
+
+
+from .tickets import verify_ticket
+
+@csrf_exempt
+def gate_validate(request):
+    # the door scanner sends the scanned QR token (?token= or POST token=), optionally with the show it is
+    # checking in (?movie=). Only the signature is checked here, nothing is read from the database.
+    token = request.POST.get('token') or request.GET.get('token')
+    ticket = verify_ticket(token)
+    if ticket is None:
+        return JsonResponse({'valid': False, 'error': 'bad_signature'}, status=400)
+    movie = request.POST.get('movie') or request.GET.get('movie')
+    if movie and str(ticket['movie']) != movie:
+        return JsonResponse({'valid': False, 'error': 'wrong_show', **ticket}, status=409)
+    return JsonResponse({'valid': True, **ticket})
+
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_POST
+from . import checkin
+
+# the gate views run on the staff session, so they keep Django's CSRF check: the gate app sends the csrftoken
+# cookie back as X-CSRFToken, and another site can't post scans or open doors through a logged-in staff browser
+
+@require_POST
+@staff_member_required
+def gate_open(request, movie_id):
+    # loads the show's paid tickets into memory, call it when doors open (scanning also does it on first use)
+    return JsonResponse({'movie': movie_id, 'tickets': checkin.open_doors(movie_id)})
+
+
+@require_POST
+@staff_member_required
+def gate_sync(request, movie_id):
+    # a gate device pushes the scans it collected: {"gate": "door-1", "scans": [{"token": ..., "scanned_at": ...}]}
+    if request.content_type != 'application/json':
+        return JsonResponse({'error': 'application/json only'}, status=415)
+    try:
+        data = json.loads(request.body or b'{}')
+        scans = data['scans']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'bad_request'}, status=400)
+    if not isinstance(scans, list):
+        return JsonResponse({'error': 'bad_request'}, status=400)
+    results = checkin.sync(movie_id, scans, gate=str(data.get('gate', '')))
+    return JsonResponse({'results': results, 'ok': sum(result['status'] == 'ok' for result in results)})
 
 
 def payment_cancel(request):
@@ -363,13 +411,18 @@ def payment_cancel(request):
 
 # Thank you page after successful payment
 def thank_you(request):
+    # this page doesn't know whose ticket it shows, so no QR code here: it is in the email and on the ticket page
     reservation = Reservation.objects.filter(is_paid=True).last()
-    return render(request, "reservations/thank_you.html", {"reservation": reservation})
+    return render(request, "reservations/thank_you.html", {
+        "reservation": reservation,
+        "qr_url": None,
+    })
 
 
 
 from django.shortcuts import render, redirect
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
+from jobs.mail import queue_email
 from django.conf import settings
 from django.contrib import messages
 
@@ -380,14 +433,13 @@ def contact_view(request):
         feedback = request.POST.get("feedback")
 
         if name and email and feedback:
-            # Send feedback email to host
-            send_mail(
+            # Send feedback email to host, through the outbox so the visitor does not wait on SMTP
+            queue_email(EmailMessage(
                 subject=f"Feedback from {name}",
-                message=f"Sender: {name}\nEmail: {email}\n\nFeedback:\n{feedback}",
+                body=f"Sender: {name}\nEmail: {email}\n\nFeedback:\n{feedback}",
                 from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[settings.DEFAULT_FROM_EMAIL], 
-                fail_silently=False,
-            )
+                to=[settings.DEFAULT_FROM_EMAIL],
+            ))
 
             return render(request, 'reservations/contact.html', {'success': True})
         else:
@@ -397,24 +449,46 @@ def contact_view(request):
 
 from django.shortcuts import render
 
+@cached_page()
 def about_view(request):
     return render(request, 'reservations/about.html')
 
 
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from .models import Movie
 
 
+# the seats-left counts also change when holds lapse, which nothing announces, hence the short timeout
+@cached_page('movies', 'seats', timeout=60)
 def cinema(request):
     query = request.GET.get('q', '')  # get search query from GET
+    next_cursor = None
+    # select_related pulls in each show's inventory row so the seats-left count costs no extra queries
     if query:
-        movies = Movie.objects.filter(title__icontains=query).order_by('show_time')
+        # best match first, see search/index.py
+        movies = search_index.find(query, kinds=['movie'], querysets={'movie': Movie.objects.select_related('inventory')})['movie']
     else:
-        movies = Movie.objects.all().order_by('show_time')  # show upcoming first
+        # a page of shows at a time in show_time order, the infinite scroll asks for the next one with ?cursor=
+        shows = Movie.objects.select_related('inventory')
+        try:
+            movies, next_cursor = keyset_page(shows, ('show_time', 'id'), request.GET.get('cursor'))
+        except BadCursor:
+            if request.GET.get('format') == 'json':
+                return JsonResponse({'error': 'bad_cursor'}, status=400)
+            # a stale or mangled link to the page itself: start from the first shows
+            movies, next_cursor = keyset_page(shows, ('show_time', 'id'))
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'html': render_to_string('reservations/movie_cards.html', {'movies': movies}, request),
+            'next': next_cursor,
+        })
 
     return render(request, 'reservations/cinema.html', {
         'movies': movies,
-        'query': query
+        'query': query,
+        'next_cursor': next_cursor,
     })
 
 
@@ -0,0 +1,10 @@
+# our search app keeps one full-text index over cinema shows and streaming titles, see search/index.py
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        import search.signals  # keeps the index up to date when a show or title is saved or deleted
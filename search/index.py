@@ -0,0 +1,174 @@
+# our search index over cinema shows (reservations.Movie) and streaming titles (streaming.StreamingContent).
+# Both catalogs live in one table, search_entry, so a single query searches both and ranks them together:
+# an FTS5 virtual table on SQLite, a table with a weighted tsvector column and a GIN index on Postgres
+# (DATABASE_URL). Titles weigh more than descriptions. The indexed text and the queries are both run through
+# search.normalize, so Ethiopic homophones and Latin case/accents match each other. Rows are written on save/delete by search/signals.py,
+# `python manage.py rebuild_search_index` refills the whole table.
+from django.apps import apps
+from django.db import connection
+
+from .normalize import normalize, tokens
+
+TABLE = 'search_entry'
+# kind -> model, the position in this list is also part of the SQLite rowid (see rowid())
+KINDS = {
+    'movie': 'reservations.Movie',
+    'streaming': 'streaming.StreamingContent',
+}
+KIND_OF = {label: kind for kind, label in KINDS.items()}
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+        kind UNINDEXED, object_id UNINDEXED, title, description, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+]
+# 'simple' because the catalog is mixed Amharic/English and the English stemmer would only mangle Amharic words
+POSTGRES_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+        kind varchar(20) NOT NULL,
+        object_id bigint NOT NULL,
+        title text NOT NULL,
+        description text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', description), 'B')
+        ) STORED,
+        PRIMARY KEY (kind, object_id)
+    )""",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_document ON {TABLE} USING gin (document)",
+]
+
+
+def supported(conn=connection):
+    return conn.vendor in ('sqlite', 'postgresql')
+
+
+def create_schema(conn=connection):
+    with conn.cursor() as cursor:
+        for statement in POSTGRES_SCHEMA if conn.vendor == 'postgresql' else SQLITE_SCHEMA:
+            cursor.execute(statement)
+
+
+def drop_schema(conn=connection):
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+def rowid(kind, object_id):
+    # FTS5 only has a fast lookup on rowid, so the (kind, id) pair is packed into it
+    return object_id * len(KINDS) + list(KINDS).index(kind)
+
+
+def entry(instance):
+    kind = KIND_OF[instance._meta.label]
+    return kind, instance.pk, normalize(instance.title), normalize(instance.description)
+
+
+def add(instances, conn=connection):
+    """
+    Write (or overwrite) the index rows of Movies / StreamingContents.
+    """
+    rows = [entry(instance) for instance in instances]
+    if not rows or not supported(conn):
+        return
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            cursor.executemany(
+                f"""INSERT INTO {TABLE} (kind, object_id, title, description) VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (kind, object_id) DO UPDATE SET title = EXCLUDED.title, description = EXCLUDED.description""",
+                rows,
+            )
+        else:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {TABLE} (rowid, kind, object_id, title, description) VALUES (%s, %s, %s, %s, %s)",
+                [(rowid(kind, object_id), kind, object_id, title, description) for kind, object_id, title, description in rows],
+            )
+
+
+def remove(instance, conn=connection):
+    if not supported(conn):
+        return
+    kind = KIND_OF[instance._meta.label]
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            cursor.execute(f"DELETE FROM {TABLE} WHERE kind = %s AND object_id = %s", [kind, instance.pk])
+        else:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [rowid(kind, instance.pk)])
+
+
+def rebuild(conn=connection, models=apps):
+    """
+    Refill the index and the normalized_title columns. Returns the number of titles indexed.
+    """
+    count = 0
+    if supported(conn):
+        with conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+    for label in KINDS.values():
+        objects = list(models.get_model(label)._default_manager.only('id', 'title', 'normalized_title', 'description'))
+        for instance in objects:
+            instance.normalized_title = normalize(instance.title)
+        models.get_model(label)._default_manager.bulk_update(objects, ['normalized_title'], batch_size=500)
+        add(objects, conn)
+        count += len(objects)
+    return count
+
+
+def search(query, limit=50, kinds=None):
+    """
+    Ranked [(kind, object id), ...] for a user's query, best match first. Every word has to match,
+    the last one as a prefix so results show up while the user is still typing.
+    """
+    words = tokens(query)
+    kinds = [kind for kind in (kinds or KINDS) if kind in KINDS]
+    if not words or not kinds:
+        return []
+    if not supported():
+        return fallback_search(words, limit, kinds)
+
+    kind_filter = ', '.join(['%s'] * len(kinds))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"""SELECT kind, object_id FROM {TABLE}, to_tsquery('simple', %s) AS query
+                    WHERE document @@ query AND kind IN ({kind_filter})
+                    ORDER BY ts_rank(document, query) DESC, object_id DESC LIMIT %s""",
+                [' & '.join(words[:-1] + [words[-1] + ':*']), *kinds, limit],
+            )
+        else:
+            # bm25 weights per column: kind, object_id, title, description (lower is better)
+            cursor.execute(
+                f"""SELECT kind, object_id FROM {TABLE}
+                    WHERE {TABLE} MATCH %s AND kind IN ({kind_filter})
+                    ORDER BY bm25({TABLE}, 0, 0, 10.0, 1.0), object_id DESC LIMIT %s""",
+                [' '.join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*', *kinds, limit],
+            )
+        return [(kind, int(object_id)) for kind, object_id in cursor.fetchall()]
+
+
+def fallback_search(words, limit, kinds):
+    # databases without a full-text index: a match on the normalized titles, newest first
+    results = []
+    for kind in kinds:
+        queryset = apps.get_model(KINDS[kind])._default_manager.all()
+        for word in words:
+            queryset = queryset.filter(normalized_title__contains=word)
+        results += [(kind, object_id) for object_id in queryset.order_by('-id').values_list('id', flat=True)[:limit]]
+    return results[:limit]
+
+
+def find(query, limit=50, kinds=None, querysets=None):
+    """
+    Search and load the matches: {kind: [objects, best match first]}. querysets can narrow a kind
+    (e.g. {'movie': Movie.objects.select_related('inventory')}).
+    """
+    querysets = querysets or {}
+    hits = search(query, limit, kinds)
+    found = {kind: [] for kind in (kinds or KINDS)}
+    for kind in found:
+        ids = [object_id for hit_kind, object_id in hits if hit_kind == kind]
+        if not ids:
+            continue
+        queryset = querysets.get(kind, apps.get_model(KINDS[kind])._default_manager.all())
+        objects = queryset.in_bulk(ids)
+        found[kind] = [objects[object_id] for object_id in ids if object_id in objects]
+    return found
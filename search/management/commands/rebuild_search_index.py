@@ -0,0 +1,14 @@
+# refills the search index and the normalized_title columns from scratch, e.g. after loaddata or a bulk import that skipped the save signals
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+
+from search import index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over shows and streaming titles."
+
+    def handle(self, *args, **options):
+        with db_transaction.atomic():
+            count = index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} titles"))
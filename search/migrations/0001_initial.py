@@ -0,0 +1,68 @@
+from django.db import migrations
+
+# a frozen copy of the schema in search/index.py at the time of this migration, so later changes there
+# don't change what this migration does
+TABLE = 'search_entry'
+# kind -> model; a row's SQLite rowid is object_id * 2 + the kind's position here
+KINDS = {
+    'movie': 'reservations.Movie',
+    'streaming': 'streaming.StreamingContent',
+}
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+        kind UNINDEXED, object_id UNINDEXED, title, description, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+]
+POSTGRES_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+        kind varchar(20) NOT NULL,
+        object_id bigint NOT NULL,
+        title text NOT NULL,
+        description text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', description), 'B')
+        ) STORED,
+        PRIMARY KEY (kind, object_id)
+    )""",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_document ON {TABLE} USING gin (document)",
+]
+
+
+def create_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ('sqlite', 'postgresql'):
+        return
+    with conn.cursor() as cursor:
+        for statement in POSTGRES_SCHEMA if conn.vendor == 'postgresql' else SQLITE_SCHEMA:
+            cursor.execute(statement)
+        for position, (kind, label) in enumerate(KINDS.items()):
+            rows = apps.get_model(label).objects.values_list('id', 'title', 'description')
+            if conn.vendor == 'postgresql':
+                cursor.executemany(
+                    f"INSERT INTO {TABLE} (kind, object_id, title, description) VALUES (%s, %s, %s, %s)",
+                    [(kind, object_id, title, description) for object_id, title, description in rows],
+                )
+            else:
+                cursor.executemany(
+                    f"INSERT INTO {TABLE} (rowid, kind, object_id, title, description) VALUES (%s, %s, %s, %s, %s)",
+                    [(object_id * 2 + position, kind, object_id, title, description) for object_id, title, description in rows],
+                )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0027_checkin'),
+        ('streaming', '0002_streamingrating_userprofile_watchhistory_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
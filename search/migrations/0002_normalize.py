@@ -0,0 +1,70 @@
+import unicodedata
+
+from django.db import migrations
+
+# frozen copies of search.normalize and the index layout at the time of this migration, so later changes
+# there don't change what this migration does
+TABLE = 'search_entry'
+KINDS = {
+    'movie': 'reservations.Movie',
+    'streaming': 'streaming.StreamingContent',
+}
+
+FOLD = {}
+for source, target, length in [
+    (0x1210, 0x1200, 8),  # ሐ -> ሀ
+    (0x1280, 0x1200, 7),  # ኀ -> ሀ
+    (0x1220, 0x1230, 8),  # ሠ -> ሰ
+    (0x12D0, 0x12A0, 7),  # ዐ -> አ
+    (0x1340, 0x1338, 8),  # ፀ -> ጸ
+]:
+    FOLD.update({source + order: target + order for order in range(length)})
+FOLD.update({0x1203: 0x1200, 0x1213: 0x1200, 0x1283: 0x1200, 0x12A3: 0x12A0, 0x12D3: 0x12A0})
+FOLD.update({char: ' ' for char in range(0x1361, 0x1369)})
+
+
+def normalize(text):
+    text = (text or '').translate(FOLD).casefold()
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return ' '.join(text.split())
+
+
+def reindex(apps, schema_editor):
+    # fills the new normalized_title columns and rewrites the index with normalized text
+    conn = schema_editor.connection
+    indexed = conn.vendor in ('sqlite', 'postgresql')
+    with conn.cursor() as cursor:
+        if indexed:
+            cursor.execute(f"DELETE FROM {TABLE}")
+        for position, (kind, label) in enumerate(KINDS.items()):
+            model = apps.get_model(label)
+            objects = list(model.objects.only('id', 'title', 'normalized_title', 'description'))
+            for instance in objects:
+                instance.normalized_title = normalize(instance.title)
+            model.objects.bulk_update(objects, ['normalized_title'], batch_size=500)
+            if not indexed:
+                continue
+            rows = [(kind, instance.pk, instance.normalized_title, normalize(instance.description)) for instance in objects]
+            if conn.vendor == 'postgresql':
+                cursor.executemany(
+                    f"INSERT INTO {TABLE} (kind, object_id, title, description) VALUES (%s, %s, %s, %s)", rows
+                )
+            else:
+                cursor.executemany(
+                    f"INSERT INTO {TABLE} (rowid, kind, object_id, title, description) VALUES (%s, %s, %s, %s, %s)",
+                    [(object_id * 2 + position, kind, object_id, title, description) for kind, object_id, title, description in rows],
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('reservations', '0028_movie_normalized_title'),
+        ('streaming', '0003_streamingcontent_normalized_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# our text normalization for search. Ge'ez script has letters that sound the same and are typed interchangeably
+# (ሀ/ሐ/ኀ, ሰ/ሠ, አ/ዐ, ጸ/ፀ, and ሃ/ኣ for ሀ/አ), so every form is folded to one, in every vowel order. Latin text is
+# case-folded and stripped of accents. The index, the normalized_title columns and the user's query all go
+# through normalize(), so they always agree.
+import re
+import unicodedata
+from functools import lru_cache
+
+# (first letter of a series folded away, first letter of the series it becomes, letters in the series)
+HOMOPHONE_SERIES = [
+    (0x1210, 0x1200, 8),  # ሐ -> ሀ
+    (0x1280, 0x1200, 7),  # ኀ -> ሀ
+    (0x1220, 0x1230, 8),  # ሠ -> ሰ
+    (0x12D0, 0x12A0, 7),  # ዐ -> አ
+    (0x1340, 0x1338, 8),  # ፀ -> ጸ
+]
+
+FOLD = {}
+for source, target, length in HOMOPHONE_SERIES:
+    FOLD.update({source + order: target + order for order in range(length)})
+# the 4th order "ha"/"a" is written for the 1st just as often: ሃ ሓ ኃ -> ሀ, ኣ ዓ -> አ
+FOLD.update({0x1203: 0x1200, 0x1213: 0x1200, 0x1283: 0x1200, 0x12A3: 0x12A0, 0x12D3: 0x12A0})
+# Ethiopic word space and punctuation (፡ ። ፣ ፤ ፥ ፦ ፧ ፨) separate words like spaces do
+FOLD.update({char: ' ' for char in range(0x1361, 0x1369)})
+
+WORD = re.compile(r'[^\W_]+')
+
+
+@lru_cache(maxsize=4096)
+def normalize(text):
+    text = (text or '').translate(FOLD).casefold()
+    if not text.isascii():
+        # drop Latin accents; Ethiopic letters have no decomposition so NFKD leaves them alone
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return ' '.join(text.split())
+
+
+def tokens(text):
+    return WORD.findall(normalize(text))
@@ -0,0 +1,31 @@
+# keeps search_entry in step with the catalogs, see search/index.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from reservations.models import Movie
+from streaming.models import StreamingContent
+from . import index, typeahead
+from .normalize import normalize
+
+
+@receiver(pre_save, sender=Movie)
+@receiver(pre_save, sender=StreamingContent)
+def normalize_title(sender, instance, **kwargs):
+    instance.normalized_title = normalize(instance.title)
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_save, sender=StreamingContent)
+def update_search_entry(sender, instance, raw=False, update_fields=None, **kwargs):
+    if sender is StreamingContent and StreamingContent.is_stats_update(update_fields):
+        return  # play counts and ratings, nothing the index holds
+    if not raw:  # loaddata, the index is rebuilt afterwards with rebuild_search_index
+        index.add([instance])
+        typeahead.add(instance)
+
+
+@receiver(post_delete, sender=Movie)
+@receiver(post_delete, sender=StreamingContent)
+def remove_search_entry(sender, instance, **kwargs):
+    index.remove(instance)
+    typeahead.remove(instance)
@@ -0,0 +1,135 @@
+# our typeahead: every process keeps the show and streaming titles in memory as two sorted lists of
+# (normalized key, kind, id): the whole titles ("addis nights") and the titles from their 2nd, 3rd... word on
+# ("nights"). A prefix is found with a bisect in each and answered without the database, whole-title
+# matches first. It is built when the server starts (see asgi.py
+# / wsgi.py), patched by the save/delete signals, and rebuilt in the background every TYPEAHEAD_REFRESH_SECONDS
+# to pick up edits made in other processes.
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.urls import reverse
+
+from .index import KIND_OF, KINDS
+from .normalize import normalize
+
+URL_NAMES = {
+    'movie': 'seat_selection',
+    'streaming': 'streaming:watch_video',
+}
+# (titles, words, items): the sorted (key, kind, id) lists and (kind, id) -> {'kind', 'id', 'title', 'url'}.
+# Replaced as a whole with one assignment, never changed in place, so a reader takes it once and needs no lock
+_index = ([], [], {})
+_built_at = None
+_lock = threading.Lock()
+_refreshing = threading.Event()
+
+
+def keys(title):
+    words = normalize(title).split()
+    return [' '.join(words[start:]) for start in range(len(words))]
+
+
+def item(kind, object_id, title):
+    return {'kind': kind, 'id': object_id, 'title': title, 'url': reverse(URL_NAMES[kind], args=[object_id])}
+
+
+def build():
+    global _index, _built_at
+    titles, words, items = [], [], {}
+    for kind, label in KINDS.items():
+        for object_id, title in apps.get_model(label)._default_manager.values_list('id', 'title'):
+            items[kind, object_id] = item(kind, object_id, title)
+            title_keys = keys(title)
+            titles += [(key, kind, object_id) for key in title_keys[:1]]
+            words += [(key, kind, object_id) for key in title_keys[1:]]
+    titles.sort()
+    words.sort()
+    with _lock:
+        _index, _built_at = (titles, words, items), time.monotonic()
+    return len(items)
+
+
+def warm():
+    # called at server start; before the first migrate there is nothing to load yet
+    try:
+        build()
+    except DatabaseError:
+        pass
+
+
+def refresh_in_background():
+    if _refreshing.is_set():
+        return
+    _refreshing.set()
+
+    def run():
+        try:
+            build()
+        finally:
+            connection.close()
+            _refreshing.clear()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def without(entries, kind, object_id):
+    return [entry for entry in entries if entry[1:] != (kind, object_id)]
+
+
+def add(instance):
+    global _index
+    if _built_at is None:
+        return  # not built in this process yet, the build will read it from the database
+    kind = KIND_OF[instance._meta.label]
+    with _lock:
+        titles, words, items = _index
+        titles, words = without(titles, kind, instance.pk), without(words, kind, instance.pk)
+        title_keys = keys(instance.title)
+        for key in title_keys[:1]:
+            insort(titles, (key, kind, instance.pk))
+        for key in title_keys[1:]:
+            insort(words, (key, kind, instance.pk))
+        _index = (titles, words, {**items, (kind, instance.pk): item(kind, instance.pk, instance.title)})
+
+
+def remove(instance):
+    global _index
+    if _built_at is None:
+        return
+    kind = KIND_OF[instance._meta.label]
+    with _lock:
+        titles, words, items = _index
+        _index = (
+            without(titles, kind, instance.pk),
+            without(words, kind, instance.pk),
+            {found: value for found, value in items.items() if found != (kind, instance.pk)},
+        )
+
+
+def suggest(query, limit=8):
+    """
+    Titles starting with (or with a word starting with) the query, whole-title matches first.
+    """
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    if _built_at is None:
+        build()
+    elif time.monotonic() - _built_at > settings.TYPEAHEAD_REFRESH_SECONDS:
+        refresh_in_background()
+
+    titles, words, items = _index
+    found = {}  # dicts keep insertion order, so this is the ranking too
+    for entries in (titles, words):
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and len(found) < limit:
+            key, kind, object_id = entries[position]
+            if not key.startswith(prefix):
+                break
+            found[kind, object_id] = items[kind, object_id]
+            position += 1
+    return list(found.values())
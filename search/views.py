@@ -0,0 +1,15 @@
+from django.http import JsonResponse
+
+from . import typeahead
+
+
+def suggest(request):
+    # autocomplete for the search boxes, answered from the in-memory typeahead index
+    query = request.GET.get('q', '')[:100]
+    try:
+        limit = min(int(request.GET.get('limit', 8)), 20)
+    except ValueError:
+        limit = 8
+    response = JsonResponse({'query': query, 'results': typeahead.suggest(query, limit)})
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.db.models import Sum, Count
 from django.utils.html import format_html
 from django.http import HttpResponse
-from django.urls import path
+from django.urls import path, reverse
 from django.shortcuts import render
 from django.utils.translation import gettext_lazy as _
 import csv
@@ -129,8 +129,8 @@ class StreamingSubscriptionAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
     def qr_preview(self, obj):
-        if obj.qr_code:
-            return format_html('<img src="{}" width="150" height="150" />', obj.qr_code.url)
+        if obj.is_paid:
+            return format_html('<img src="{}" width="150" height="150" />', reverse('streaming:subscription_qr', args=[obj.chapa_tx_ref]))
         return _("No QR code")
     qr_preview.short_description = _("QR Code")
 
@@ -255,4 +255,19 @@ class StreamingAnalyticsProxyAdmin(admin.ModelAdmin):
             "country_views": country_views,
         })
 
-        return super().changelist_view(request, extra_context=extra_context)
\ No newline at end of file
+        return super().changelist_view(request, extra_context=extra_context)
+
+from .models import CatalogSnapshot
+from .catalog import ALL, schedule_refresh
+
+
+@admin.register(CatalogSnapshot)
+class CatalogSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'country', 'refreshed_at')
+    readonly_fields = ('ranked_ids', 'category_groups', 'categories', 'genres', 'languages', 'refreshed_at')
+    actions = ['refresh_all']
+
+    @admin.action(description=_("Refresh all catalog snapshots now"))
+    def refresh_all(self, request, queryset):
+        schedule_refresh(ALL, right_away=True)
+        self.message_user(request, _("Catalog refresh queued."))
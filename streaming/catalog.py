@@ -0,0 +1,89 @@
+# our streaming catalog read model. Ranking titles by plays in a country means summing the whole view log, so it
+# is done by the streaming.refresh_catalog job and stored in a CatalogSnapshot per country (plus a global one);
+# streaming_home reads one snapshot row and loads only the titles of the page it shows.
+# A play schedules a refresh of that viewer's country, a catalog edit one of every snapshot; refreshes are
+# debounced, so a busy evening costs one ranking query per country per REFRESH_DELAY.
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from cinema_reservation.pagination import BadCursor, encode_cursor, load_cursor
+from jobs.models import Job
+from jobs.queue import enqueue
+from .models import CatalogSnapshot, StreamingContent
+
+GLOBAL = ''
+ALL = '*'  # every existing snapshot
+REFRESH_DELAY = timedelta(seconds=60)
+
+
+def ranked_titles(country):
+    if country:
+        # the titles played in that country, most played first
+        titles = StreamingContent.objects.filter(streamviewlog__country=country).annotate(
+            country_plays=Sum('streamviewlog__views')
+        ).order_by('-country_plays', '-release_date', '-id')
+    else:
+        titles = StreamingContent.objects.order_by('-release_date', '-id')
+    return list(titles.values_list('id', 'category', 'genre', 'language'))
+
+
+def build(country):
+    rows = ranked_titles(country)
+    category_groups = {}
+    for object_id, category, genre, language in rows:
+        category_groups.setdefault(category, []).append(object_id)
+    snapshot, created = CatalogSnapshot.objects.update_or_create(country=country, defaults={
+        'ranked_ids': [row[0] for row in rows],
+        'category_groups': category_groups,
+        'categories': list(category_groups),
+        'genres': list(dict.fromkeys(row[2] for row in rows)),
+        'languages': list(dict.fromkeys(row[3] for row in rows)),
+    })
+    return snapshot
+
+
+def refresh(country):
+    countries = [country]
+    if country == ALL:
+        countries = [GLOBAL] + list(CatalogSnapshot.objects.exclude(country=GLOBAL).values_list('country', flat=True))
+    for country in countries:
+        build(country)
+    return len(countries)
+
+
+def schedule_refresh(country, right_away=False):
+    # one waiting refresh per country is enough, it reads everything that happened before it runs
+    if not Job.objects.filter(name='streaming.refresh_catalog', status='queued', payload__country=country).exists():
+        run_after = timezone.now() if right_away else timezone.now() + REFRESH_DELAY
+        enqueue('streaming.refresh_catalog', run_after=run_after, country=country)
+
+
+def snapshot_for(country):
+    country = str(country or GLOBAL)
+    snapshot = CatalogSnapshot.objects.filter(country=country).first()
+    if snapshot is None:
+        snapshot = build(country)  # first visitor from there, before any job has run
+    if country and not snapshot.ranked_ids:
+        return snapshot_for(GLOBAL)  # nothing played in that country yet
+    return snapshot
+
+
+def page(snapshot, cursor=None, size=24):
+    """
+    One page of a snapshot's titles: (StreamingContents in rank order, next cursor or None).
+    The cursor is the last title shown, so a refresh between two pages does not repeat or skip titles.
+    """
+    ids = snapshot.ranked_ids
+    start = 0
+    if cursor:
+        last_id = load_cursor(cursor, 1)[0]
+        if not isinstance(last_id, int):
+            raise BadCursor(cursor)
+        start = ids.index(last_id) + 1 if last_id in ids else len(ids)
+    page_ids = ids[start:start + size]
+    titles = StreamingContent.objects.in_bulk(page_ids)
+    contents = [titles[object_id] for object_id in page_ids if object_id in titles]
+    next_cursor = encode_cursor([page_ids[-1]]) if start + size < len(ids) else None
+    return contents, next_cursor
@@ -0,0 +1,73 @@
+# our faceted browsing over the streaming catalog (category, genre, language). Filtering happens in the database
+# (keyset pages, see cinema_reservation/pagination.py). The facet counts all come from a single grouped query,
+# count per (category, genre, language) combination, which is cached until the catalog changes (the page cache's
+# 'streaming' generation); the count for any selection is then summed from that small table in Python.
+from django.core.cache import cache
+from django.db.models import Count
+
+from cinema_reservation import pagecache
+from cinema_reservation.pagination import keyset_page
+from .models import StreamingContent
+
+FACETS = {
+    'category': StreamingContent.CATEGORY_CHOICES,
+    'genre': StreamingContent.GENRE_CHOICES,
+    'language': StreamingContent.LANGUAGE_CHOICES,
+}
+COMBINATIONS_TIMEOUT = 24 * 3600
+
+
+def selected(params):
+    # the valid facet values in a query string, e.g. {'genre': 'drama'}
+    return {
+        facet: params[facet] for facet, choices in FACETS.items()
+        if params.get(facet) in dict(choices)
+    }
+
+
+def combinations():
+    key = 'facets:combinations:%s' % pagecache.generations(['streaming'])[0]
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(
+            StreamingContent.objects.values_list(*FACETS).annotate(count=Count('id')).order_by()
+        )
+        cache.set(key, rows, COMBINATIONS_TIMEOUT)
+    return rows
+
+
+def counts(selection):
+    """
+    {facet: {value: number of titles}} for a selection. A facet's counts apply the other facets' selection but
+    not its own, so they say how many titles picking that value instead would show.
+    """
+    found = {facet: {} for facet in FACETS}
+    for *values, count in combinations():
+        row = dict(zip(FACETS, values))
+        for facet in FACETS:
+            if all(row[other] == value for other, value in selection.items() if other != facet):
+                found[facet][row[facet]] = found[facet].get(row[facet], 0) + count
+    return found
+
+
+def options(facet_counts, order=None):
+    """
+    [(value, label, count), ...] per facet for the filter selects, in the given order of values
+    (e.g. the viewer's catalog snapshot), then the most common first.
+    """
+    order = order or {}
+    found = {}
+    for facet, choices in FACETS.items():
+        labels = dict(choices)
+        position = {value: index for index, value in enumerate(order.get(facet, []))}
+        values = sorted(
+            facet_counts[facet],
+            key=lambda value: (position.get(value, len(position)), -facet_counts[facet][value], value),
+        )
+        found[facet] = [(value, labels.get(value, value), facet_counts[facet][value]) for value in values]
+    return found
+
+
+def browse(selection, cursor=None, size=24):
+    # the titles matching a selection, newest first, one keyset page at a time
+    return keyset_page(StreamingContent.objects.filter(**selection), ('-release_date', '-id'), cursor, size)
@@ -0,0 +1,155 @@
+# our HLS delivery. Playlists and segments under MEDIA_ROOT/hls/<content id>/ are only served with a valid signed
+# URL (streaming.utils) to a user with an active subscription. Playlists are small and rewritten so every URI in
+# them carries a signature of its own, valid for the length of the title: a VOD playlist is fetched once and its
+# segments for the rest of the film, so they can't share the playlist's short expiry. Segments never pass through Python buffers: the front server sends them
+# (HLS_SENDFILE = 'X-Accel-Redirect' for nginx, 'X-Sendfile' for Apache/lighttpd), or else a FileResponse over
+# the open file, which WSGI servers with a file_wrapper (gunicorn) send with os.sendfile, byte ranges included.
+import os
+import re
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .models import StreamingContent
+from .utils import bucket_expiry, expiry_headers, url_signature
+
+CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+    '.m4s': 'video/iso.segment',
+    '.mp4': 'video/mp4',
+    '.aac': 'audio/aac',
+    '.vtt': 'text/vtt',
+}
+# on top of the title's running time, for pauses and rewinds
+SEGMENT_GRACE_SECONDS = 2 * 60 * 60
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# URI="..." attributes of playlist tags; the AES key (EXT-X-KEY) has its own login-protected view
+TAG_URI = re.compile(r'^(#EXT-X-(?!KEY)[A-Z-]+:.*URI=")([^"]+)(".*)$')
+
+
+def hls_root(content_id):
+    return os.path.realpath(os.path.join(settings.MEDIA_ROOT, 'hls', str(content_id)))
+
+
+def resolve(content_id, path):
+    # the file for a request path, or None for anything outside the title's folder or of a type we don't serve
+    root = hls_root(content_id)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(root + os.sep) or not os.path.isfile(full_path):
+        return None
+    if os.path.splitext(full_path)[1].lower() not in CONTENT_TYPES:
+        return None
+    return full_path
+
+
+def segment_query(content_id):
+    # the signed query string for the URIs inside a title's playlists, good for the whole title. Bucketed like the
+    # playlist URLs, so the rewritten playlist stays the same (and cacheable) for a while
+    minutes = StreamingContent.objects.filter(id=content_id).values_list('duration_minutes', flat=True).first() or 0
+    expires = bucket_expiry(minutes * 60 + SEGMENT_GRACE_SECONDS)
+    return urlencode({'video_id': content_id, 'expires': expires, 'signature': url_signature(str(content_id), expires)})
+
+
+def sign_uri(uri, query):
+    if not uri or uri.startswith(('http://', 'https://', 'data:', '/')):
+        return uri
+    return f"{uri}{'&' if '?' in uri else '?'}{query}"
+
+
+def rewrite_playlist(text, query):
+    lines = []
+    for line in text.splitlines():
+        tag = TAG_URI.match(line)
+        if tag:
+            line = f"{tag.group(1)}{sign_uri(tag.group(2), query)}{tag.group(3)}"
+        elif line.strip() and not line.startswith('#'):
+            line = sign_uri(line.strip(), query)
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+class FileRange:
+    # a byte range of an open file: read() stops at the end of the range, and fileno() hands over the file,
+    # already positioned at the start, so a WSGI file_wrapper can sendfile() exactly Content-Length bytes
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def byte_range(header, size):
+    # (start, end) of a single "bytes=" range, None to send the whole file, False if it cannot be satisfied
+    match = RANGE.match(header or '')
+    if not match or match.group(1) == match.group(2) == '':
+        return None  # absent, malformed or a multi-range request: the whole file is a valid answer
+    first, last = match.groups()
+    if first == '':
+        start, end = max(0, size - int(last)), size - 1  # the last N bytes
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def serve_file(request, content_id, full_path, expires):
+    extension = os.path.splitext(full_path)[1].lower()
+    content_type = CONTENT_TYPES[extension]
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    if extension == '.m3u8':
+        with open(full_path, encoding='utf-8') as playlist:
+            response = HttpResponse(rewrite_playlist(playlist.read(), segment_query(content_id)), content_type=content_type)
+        return expiry_headers(response, expires)
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return expiry_headers(HttpResponseNotModified(headers={'ETag': etag}), expires)
+
+    if settings.HLS_SENDFILE == 'X-Accel-Redirect':
+        # nginx: location <HLS_ACCEL_PREFIX> { internal; alias <MEDIA_ROOT>/hls/; }, it handles Range itself
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.HLS_ACCEL_PREFIX + os.path.relpath(full_path, hls_root('')).replace(os.sep, '/')
+        response['ETag'] = etag
+        return expiry_headers(response, expires)
+    if settings.HLS_SENDFILE == 'X-Sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        response['ETag'] = etag
+        return expiry_headers(response, expires)
+
+    # a Range only applies while the file is the one the client has part of (If-Range)
+    if_range = request.headers.get('If-Range')
+    requested = byte_range(request.headers.get('Range'), stat.st_size) if if_range in (None, etag) else None
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    file = open(full_path, 'rb')
+    if requested:
+        start, end = requested
+        response = FileResponse(FileRange(file, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    else:
+        response = FileResponse(file, content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return expiry_headers(response, expires)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('streaming', '0002_streamingrating_userprofile_watchhistory_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='streamingcontent',
+            name='normalized_title',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, verbose_name='Normalized Title'),
+        ),
+    ]
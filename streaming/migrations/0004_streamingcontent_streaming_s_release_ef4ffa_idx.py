@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('streaming', '0003_streamingcontent_normalized_title'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='streamingcontent',
+            index=models.Index(fields=['release_date', 'id'], name='streaming_s_release_ef4ffa_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('streaming', '0004_streamingcontent_streaming_s_release_ef4ffa_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(blank=True, max_length=2, unique=True, verbose_name='Country')),
+                ('ranked_ids', models.JSONField(default=list, verbose_name='Ranked Titles')),
+                ('category_groups', models.JSONField(default=dict, verbose_name='Category Groups')),
+                ('categories', models.JSONField(default=list, verbose_name='Categories')),
+                ('genres', models.JSONField(default=list, verbose_name='Genres')),
+                ('languages', models.JSONField(default=list, verbose_name='Languages')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Refreshed At')),
+            ],
+        ),
+    ]
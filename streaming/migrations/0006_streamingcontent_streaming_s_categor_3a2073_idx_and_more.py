@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('streaming', '0005_catalogsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='streamingcontent',
+            index=models.Index(fields=['category', 'release_date', 'id'], name='streaming_s_categor_3a2073_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='streamingcontent',
+            index=models.Index(fields=['genre', 'release_date', 'id'], name='streaming_s_genre_bb1769_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='streamingcontent',
+            index=models.Index(fields=['language', 'release_date', 'id'], name='streaming_s_languag_b30888_idx'),
+        ),
+    ]
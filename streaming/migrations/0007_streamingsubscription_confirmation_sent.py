@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('streaming', '0006_streamingcontent_streaming_s_categor_3a2073_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='streamingsubscription',
+            name='confirmation_sent',
+            field=models.BooleanField(default=False, verbose_name='Confirmation Sent'),
+        ),
+    ]
@@ -37,6 +37,8 @@ class StreamingSubscription(models.Model):
     chapa_tx_ref = models.CharField(_("Chapa Transaction Reference"), max_length=100, unique=True)
     amount = models.DecimalField(_("Amount"), max_digits=10, decimal_places=2, default=0)
     is_paid = models.BooleanField(_("Paid"), default=False)
+    # set when the confirmation email is queued, so a rerun of the job doesn't mail it twice
+    confirmation_sent = models.BooleanField(_("Confirmation Sent"), default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     access_expires_at = models.DateTimeField(_("Access Expires At"), null=True, blank=True)
     qr_code = models.ImageField(_("QR Code"), upload_to='qrcodes/', blank=True, null=True)
@@ -44,6 +46,12 @@ class StreamingSubscription(models.Model):
     def has_access(self):
         return self.is_paid and self.access_expires_at and timezone.now() < self.access_expires_at
 
+    def qr_payload(self):
+        return (
+            "Qine Entertainment Subscription\n"
+            f"Name: {self.full_name}\nEmail: {self.email}\nType: {self.subscription_type}"
+        )
+
     def str(self):
         return f"{self.full_name} - {self.subscription_type}"
 
@@ -122,6 +130,8 @@ class StreamingContent(models.Model):
     ]
 
     title = models.CharField(_("Title"), max_length=255)
+    # the title as search sees it (search.normalize), filled in on save
+    normalized_title = models.CharField(_("Normalized Title"), max_length=255, blank=True, editable=False, db_index=True)
     description = models.TextField(_("Description"))
 
     category = models.CharField(
@@ -194,6 +204,26 @@ class StreamingContent(models.Model):
     average_rating = models.FloatField(_("Average Rating"), default=0.0)
     total_ratings = models.PositiveIntegerField(_("Total Ratings"), default=0)
 
+    # written by playback and rating updates; saving only these changes nothing a catalog page shows
+    STATS_FIELDS = frozenset([
+        'total_plays', 'unique_viewers', 'total_watch_time_seconds', 'completion_rate',
+        'average_rating', 'total_ratings', 'hls_folder',
+    ])
+
+    @classmethod
+    def is_stats_update(cls, update_fields):
+        return bool(update_fields) and set(update_fields) <= cls.STATS_FIELDS
+
+    class Meta:
+        # the catalog pages through titles by (release_date, id), newest first, see cinema_reservation/pagination.py
+        indexes = [
+            models.Index(fields=['release_date', 'id']),
+            # browsing by one facet, newest first, see streaming/facets.py
+            models.Index(fields=['category', 'release_date', 'id']),
+            models.Index(fields=['genre', 'release_date', 'id']),
+            models.Index(fields=['language', 'release_date', 'id']),
+        ]
+
     def str(self):
         return self.title
 
@@ -300,3 +330,29 @@ class StreamingAnalyticsProxy(StreamingContent):
         verbose_name = "Streaming Analytics"
         verbose_name_plural = "Streaming Analytics"
 
+
+
+# our precomputed catalog for streaming_home, one row per viewer country plus the global one (country ''):
+# the ranked title ids and the filter lists, rebuilt in the background by the streaming.refresh_catalog job,
+# see streaming/catalog.py
+class CatalogSnapshot(models.Model):
+    country = models.CharField(_("Country"), max_length=2, unique=True, blank=True)
+    ranked_ids = models.JSONField(_("Ranked Titles"), default=list)
+    # category -> ranked title ids of that category
+    category_groups = models.JSONField(_("Category Groups"), default=dict)
+    categories = models.JSONField(_("Categories"), default=list)
+    genres = models.JSONField(_("Genres"), default=list)
+    languages = models.JSONField(_("Languages"), default=list)
+    refreshed_at = models.DateTimeField(_("Refreshed At"), auto_now=True)
+
+    def __str__(self):
+        return f"{self.country or 'global'} - {len(self.ranked_ids)} titles"
+
+
+@receiver(post_save, sender=StreamingContent)
+@receiver(models.signals.post_delete, sender=StreamingContent)
+def refresh_catalog_snapshots(sender, instance, update_fields=None, **kwargs):
+    # a title was added, edited or removed: every snapshot may list it
+    if not StreamingContent.is_stats_update(update_fields):
+        from .catalog import ALL, schedule_refresh
+        schedule_refresh(ALL, right_away=True)
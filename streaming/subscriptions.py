@@ -0,0 +1,37 @@
+# our subscription activation, shared by the verify view and the reconcile_payments command.
+# Activating is claimed with a conditional UPDATE on is_paid, so a subscription is only ever activated
+# (and its email queued) once, whoever gets there first.
+from datetime import timedelta
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from jobs.queue import enqueue
+from .models import StreamingSubscription, Transaction
+
+PLAN_DURATIONS = {
+    'monthly': timedelta(days=30),
+    'annual': timedelta(days=365),
+}
+
+
+def activate(subscription):
+    """
+    Mark a paid subscription active and queue its QR code and confirmation email.
+    Returns False if it was already active.
+    """
+    access_expires_at = None
+    if subscription.subscription_type in PLAN_DURATIONS:
+        access_expires_at = timezone.now() + PLAN_DURATIONS[subscription.subscription_type]
+    with db_transaction.atomic():
+        if not StreamingSubscription.objects.filter(id=subscription.id, is_paid=False).update(
+            is_paid=True, access_expires_at=access_expires_at
+        ):
+            return False
+        subscription.is_paid = True
+        subscription.access_expires_at = access_expires_at
+        Transaction.objects.filter(tx_ref=subscription.chapa_tx_ref, status='initiated').update(status='success')
+
+        # the QR code and email are sent by the job worker, after this transaction commits
+        enqueue('streaming.send_subscription_confirmation', subscription_id=subscription.id)
+    return True
@@ -0,0 +1,49 @@
+# our background tasks for the streaming app, run by the jobs worker (python manage.py run_jobs)
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction as db_transaction
+from django.utils.translation import gettext_lazy as _
+
+from cinema_reservation import qr
+from jobs.mail import queue_email
+from jobs.queue import task
+from . import catalog
+from .models import StreamingSubscription
+
+
+@task('streaming.send_subscription_confirmation')
+def send_subscription_confirmation(subscription_id):
+    subscription = StreamingSubscription.objects.filter(id=subscription_id).first()
+    if subscription is None or subscription.confirmation_sent:
+        return  # deleted before the worker got to it, or already mailed
+
+    # ✅ Email with Amharic + English
+    email_body = (
+        "Hi %(name)s,\n\n"
+        "Your %(plan)s subscription is now active!\n\n"
+        "Thanks for choosing Qine Entertainem\n\n"
+        "-----------------------------\n"
+        "ሰላም %(name)s,\n\n"
+        "የእርስዎ የ%(plan)s የመዝናኛ መደበኛነት አሁን ተመዝግቧል!\n\n"
+        "ቅኔን ስለመረጡ እናመሰግናለን።"
+    ) % {
+        'name': subscription.full_name,
+        'plan': subscription.subscription_type
+    }
+
+    email = EmailMessage(
+        subject=_("🎫 Qine Entertainment Subscription Confirmed"),
+        body=email_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[subscription.email],
+    )
+    email.attach(f"subscription_qr_{subscription.id}.png", qr.render(subscription.qr_payload()), 'image/png')
+    with db_transaction.atomic():
+        if StreamingSubscription.objects.filter(id=subscription.id, confirmation_sent=False).update(confirmation_sent=True):
+            queue_email(email)
+
+
+@task('streaming.refresh_catalog')
+def refresh_catalog(country):
+    # rebuilds the catalog snapshot of one country, '' for the global one or '*' for all of them
+    catalog.refresh(country)
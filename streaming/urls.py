@@ -10,12 +10,14 @@ urlpatterns = [
     path('subscribe/', create_subscription, name='create_subscription'),
     path('verify/', verify_subscription_payment, name='verify_subscription_payment'),
     path('thankyou/', subscription_thankyou, name='subscription_thankyou'),
+    path('qr/<str:tx_ref>.png', views.subscription_qr, name='subscription_qr'),
 
     path('media/hls_keys/<str:key_filename>/', views.serve_hls_key, name='serve_hls_key'),
     path('media/hls_keys/<str:key_filename>/', views.serve_hls_key, name='serve_hls_key'),
 
     # Streaming
     path('', views.streaming_home, name='streaming_home'),
+    path('browse/', views.browse_catalog, name='browse_catalog'),
     path('watch/<int:content_id>/', views.watch_video, name='watch_video'),
     path('watch/<int:content_id>/report/', views.report_watch_time, name='report_watch_time'),
     path('profile/', views.user_profile, name='user_profile'),
@@ -3,39 +3,75 @@ import subprocess
 import time
 import hmac
 import hashlib
+from functools import lru_cache
 from urllib.parse import urlencode
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils.http import http_date
 
 # ------------------- Signed URL Utilities -------------------
-def generate_signed_url(video_id, base_url, expire_seconds=300):
-    # generate a signed URL for HLS videos (.m3u8)
-    if base_url.lower().endswith('.mp4'):
-        return base_url
+# our signed URLs expire on bucket boundaries (every SIGNED_URL_BUCKET_SECONDS) instead of exactly
+# expire_seconds after each call, so within a bucket a title always gets the same URL: browsers and proxies can
+# reuse the playlist, and the signature is computed once per title and bucket (memoized below).
+# A URL stays valid for between expire_seconds and expire_seconds + one bucket.
 
-    expires = int(time.time()) + expire_seconds
-    data = f"{video_id}:{expires}"
-    signature = hmac.new(
+def bucket_expiry(expire_seconds=300, now=None):
+    bucket = settings.SIGNED_URL_BUCKET_SECONDS
+    now = time.time() if now is None else now
+    return int(-(-(now + expire_seconds) // bucket) * bucket)  # rounded up to the end of its bucket
+
+
+@lru_cache(maxsize=4096)
+def url_signature(video_id, expires):
+    return hmac.new(
         settings.SIGNED_URL_SECRET.encode(),
-        data.encode(),
+        f"{video_id}:{expires}".encode(),
         hashlib.sha256
     ).hexdigest()
 
-    query_params = {"video_id": video_id, "expires": expires, "signature": signature}
+
+@lru_cache(maxsize=4096)
+def signed_url(video_id, base_url, expires):
+    query_params = {"video_id": video_id, "expires": expires, "signature": url_signature(video_id, expires)}
     return f"{base_url}?{urlencode(query_params)}"
 
+
+def generate_signed_url(video_id, base_url, expire_seconds=300):
+    # generate a signed URL for HLS videos (.m3u8)
+    if base_url.lower().endswith('.mp4'):
+        return base_url
+    return signed_url(str(video_id), base_url, bucket_expiry(expire_seconds))
+
+
+def sign_many(items, expire_seconds=300):
+    """
+    Sign a whole page of videos at once: [(video_id, base_url), ...] -> [url, ...], all with the same expiry.
+    """
+    expires = bucket_expiry(expire_seconds)
+    return [
+        base_url if base_url.lower().endswith('.mp4') else signed_url(str(video_id), base_url, expires)
+        for video_id, base_url in items
+    ]
+
+
 def validate_signed_url(video_id, expires, signature):
     # Verify that a signed URL is valid
-    if int(expires) < time.time():
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time():
         return False
 
-    expected_signature = hmac.new(
-        settings.SIGNED_URL_SECRET.encode(),
-        f"{video_id}:{expires}".encode(),
-        hashlib.sha256
-    ).hexdigest()
+    # compared as bytes: compare_digest raises TypeError for non-ASCII str, and the query string can carry anything
+    return hmac.compare_digest(url_signature(str(video_id), expires).encode(), (signature or '').encode('utf-8', 'replace'))
+
 
-    return hmac.compare_digest(expected_signature, signature)
+def expiry_headers(response, expires):
+    # whatever is served under a signed URL may be cached, but never beyond the signature's expiry
+    response['Cache-Control'] = f'private, max-age={max(0, int(expires - time.time()))}'
+    response['Expires'] = http_date(int(expires))
+    return response
 
 # ------------------- Video Validation -------------------
 ALLOWED_VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv', '.webm']
@@ -6,7 +6,8 @@ import qrcode
 from io import BytesIO
 from datetime import timedelta
 
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
 from django.core.files.base import ContentFile
 from django.core.mail import EmailMessage
@@ -40,9 +41,8 @@ from .models import (
 )
 from .forms import StreamingSubscriptionForm, CustomUserSignupForm, ProfileUpdateForm
 from .utils import generate_signed_url
-
-CHAPA_BASE_URL = "https://api.chapa.co/v1"
-CHAPA_SECRET_KEY = "CHASECK_TEST-LVVM7kiTEAfpgTT9ULzRH4qm4dtac79i"
+from . import subscriptions
+from cinema_reservation import chapa, qr
 
 SUBSCRIPTION_PRICES = {
     'monthly': 500.00,
@@ -51,107 +51,70 @@ SUBSCRIPTION_PRICES = {
 
 # ---------------------------
 # Subscription and Payment Views
-def create_subscription(request):
+async def create_subscription(request):
+    # async so the Chapa call does not hold a worker, form validation and saving run via sync_to_async
     if request.method == 'POST':
         form = StreamingSubscriptionForm(request.POST)
-        if form.is_valid():
+        if await sync_to_async(form.is_valid)():
             subscription = form.save(commit=False)
             subscription.amount = SUBSCRIPTION_PRICES[subscription.subscription_type]
             tx_ref = str(uuid.uuid4())
             subscription.chapa_tx_ref = tx_ref
-            subscription.save()
+            await subscription.asave()
 
             payload = {
-                "amount": subscription.amount,
+                "amount": str(subscription.amount),
                 "currency": "ETB",
                 "email": subscription.email,
                 "first_name": subscription.full_name,
                 "tx_ref": tx_ref,
                 "callback_url": request.build_absolute_uri('/streaming/verify/'),
                 "return_url": request.build_absolute_uri(f'/streaming/verify/?tx_ref={tx_ref}'),
-                "customization[title]": _("Streaming")
+                "customization[title]": str(_("Streaming"))
             }
 
-            headers = {"Authorization": f"Bearer {CHAPA_SECRET_KEY}"}
-            response = requests.post(f"{CHAPA_BASE_URL}/transaction/initialize", data=payload, headers=headers)
-
-            if response.status_code == 200 and response.json().get("status") == "success":
-                payment_url = response.json()['data']['checkout_url']
-                return redirect(payment_url)
-            else:
-                return HttpResponse(_("Failed to initialize Chapa payment. Response: %(response)s") % {'response': response.text}, status=500)
+            try:
+                response_data = await chapa.ainitialize_payment(payload)
+            except chapa.ChapaError as e:
+                return HttpResponse(_("Failed to initialize Chapa payment. Response: %(response)s") % {'response': e}, status=500)
+            return redirect(response_data['data']['checkout_url'])
     else:
         form = StreamingSubscriptionForm()
 
-    return render(request, 'streaming/create_subscription.html', {'form': form})
+    return await sync_to_async(render)(request, 'streaming/create_subscription.html', {'form': form})
 
-def verify_subscription_payment(request):
+async def verify_subscription_payment(request):
     tx_ref = request.GET.get('tx_ref')
     if not tx_ref:
         return HttpResponse(_("No transaction reference provided."))
 
-    subscription = get_object_or_404(StreamingSubscription, chapa_tx_ref=tx_ref)
+    subscription = await aget_object_or_404(StreamingSubscription, chapa_tx_ref=tx_ref)
 
     if subscription.is_paid:
         return redirect(f'/streaming/thankyou/?tx_ref={tx_ref}')
 
-    headers = {"Authorization": f"Bearer {CHAPA_SECRET_KEY}"}
-    response = requests.get(f"{CHAPA_BASE_URL}/transaction/verify/{tx_ref}", headers=headers)
-
-    if response.status_code == 200 and response.json()['status'] == 'success':
-        data = response.json()['data']
-        if data['status'] == 'success':
-            subscription.is_paid = True
-
-            if subscription.subscription_type == 'monthly':
-                subscription.access_expires_at = timezone.now() + timedelta(days=30)
-            elif subscription.subscription_type == 'annual':
-                subscription.access_expires_at = timezone.now() + timedelta(days=365)
-
-            qr_data = _("Qine Entertainment Subscription\nName: %(name)s\nEmail: %(email)s\nType: %(type)s") % {
-                'name': subscription.full_name,
-                'email': subscription.email,
-                'type': subscription.subscription_type
-            }
-            qr = qrcode.make(qr_data)
-            buffer = BytesIO()
-            qr.save(buffer, format="PNG")
-            file_name = f"{tx_ref}.png"
-            subscription.qr_code.save(file_name, ContentFile(buffer.getvalue()))
-            buffer.close()
-
-            subscription.save()
-
-            # ✅ Email with Amharic + English
-            email_body = (
-                "Hi %(name)s,\n\n"
-                "Your %(plan)s subscription is now active!\n\n"
-                "Thanks for choosing Qine Entertainem\n\n"
-                "-----------------------------\n"
-                "ሰላም %(name)s,\n\n"
-                "የእርስዎ የ%(plan)s የመዝናኛ መደበኛነት አሁን ተመዝግቧል!\n\n"
-                "ቅኔን ስለመረጡ እናመሰግናለን።"
-            ) % {
-                'name': subscription.full_name,
-                'plan': subscription.subscription_type
-            }
+    try:
+        result = await chapa.averify_payment(tx_ref)
+    except chapa.ChapaError:
+        return HttpResponse(_("Payment verification failed."))
 
-            email = EmailMessage(
-                subject=_("🎫 Qine Entertainment Subscription Confirmed"),
-                body=email_body,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[subscription.email],
-            )
-            if subscription.qr_code:
-                email.attach_file(subscription.qr_code.path)
-            email.send(fail_silently=True)
+    return await sync_to_async(subscription_payment_result)(subscription, tx_ref, result)
 
+def subscription_payment_result(subscription, tx_ref, result):
+    # activates the subscription (QR code + confirmation email) once Chapa has answered
+    if result.get('status') == 'success':
+        if chapa.is_verified(result):
+            subscriptions.activate(subscription)
             return redirect(f'/streaming/thankyou/?tx_ref={tx_ref}')
         else:
             return HttpResponse(_("Payment not successful."))
     else:
         return HttpResponse(_("Payment verification failed."))
 
+def subscription_qr(request, tx_ref):
+    subscription = get_object_or_404(StreamingSubscription, chapa_tx_ref=tx_ref, is_paid=True)
+    return qr.qr_response(request, subscription.qr_payload(), request.GET.get('format', 'png'))
+
 def subscription_thankyou(request):
     tx_ref = request.GET.get('tx_ref')
     subscription = StreamingSubscription.objects.filter(chapa_tx_ref=tx_ref).first()
@@ -167,11 +130,8 @@ from django.utils.translation import gettext as _
 from .forms import CustomUserSignupForm
 from .models import StreamingSubscription, Transaction, User
 import uuid
-import requests
 from django.conf import settings
 
-CHAPA_BASE_URL = "https://api.chapa.co/v1"
-
 def user_signup(request):
     if request.method == 'POST':
         form = CustomUserSignupForm(request.POST)
@@ -202,11 +162,13 @@ def user_signup(request):
                 "customization[description]": str(_("%(plan)s subscription for streaming access") % {'plan': plan.capitalize()}),
             }
 
-            headers = {"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
-            response = requests.post(f"{CHAPA_BASE_URL}/transaction/initialize", json=chapa_payload, headers=headers)
-            response_data = response.json()
+            try:
+                response_data = chapa.initialize_payment(chapa_payload)
+            except chapa.ChapaError as e:
+                response_data = None
+                error = e
 
-            if response.status_code == 200 and response_data.get('status') == 'success':
+            if response_data:
                 # Now safe to create user, subscription, and transaction
                 user = form.save(commit=False)
                 user.is_active = True
@@ -237,7 +199,7 @@ def user_signup(request):
                 # Redirect to Chapa checkout
                 return redirect(response_data['data']['checkout_url'])
             else:
-                messages.error(request, _("Failed to initialize payment: %(response)s") % {'response': response_data})
+                messages.error(request, _("Failed to initialize payment: %(response)s") % {'response': error})
         else:
             messages.error(request, _("Please correct the errors below."))
     else:
@@ -282,7 +244,10 @@ from django.db.models import Sum
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from .models import StreamingContent, UserProfile, StreamViewLog
-from .utils import generate_signed_url  # your existing utility
+from .utils import generate_signed_url, sign_many  # your existing utility
+from django.template.loader import render_to_string
+from cinema_reservation.pagination import BadCursor
+from . import catalog, facets
 
 @login_required
 def streaming_home(request):
@@ -290,43 +255,89 @@ def streaming_home(request):
     profile = UserProfile.objects.filter(user=request.user).first()
     user_country = profile.country if profile else None
 
-    # Filter contents for country-based recommendation
-    if user_country:
-        contents = StreamingContent.objects.filter(
-            streamviewlog__country=user_country
-        ).annotate(
-            country_plays=Sum('streamviewlog__views')
-        ).order_by('-country_plays', '-release_date').distinct()
-    else:
-        contents = StreamingContent.objects.all().order_by('-release_date')
+    # the country's precomputed ranking and filter lists (most played there first), see streaming/catalog.py
+    snapshot = catalog.snapshot_for(user_country)
+    # ?category= / ?genre= / ?language= filter in the database, see streaming/facets.py
+    selection = facets.selected(request.GET)
 
-    # Generate signed URLs for HLS videos
-    for content in contents:
-        if content.video_url and content.video_url.endswith('.m3u8'):
-            base_url = request.build_absolute_uri(content.video_url)
-            content.signed_url = generate_signed_url(video_id=str(content.pk), base_url=base_url)
-        else:
-            content.signed_url = content.video_file.url if content.video_file else ""
-
-    # Distinct values for filters (remove duplicates while keeping order)
-    categories = list(dict.fromkeys([content.get_category_display() for content in contents]))
-    genres = list(dict.fromkeys([content.genre for content in contents]))
-    languages = list(dict.fromkeys([content.language for content in contents]))
+    # one page at a time, the infinite scroll asks for the next one with ?cursor=
+    cursor = request.GET.get('cursor')
+    try:
+        contents, next_cursor = facets.browse(selection, cursor) if selection else catalog.page(snapshot, cursor)
+    except BadCursor:
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'error': 'bad_cursor'}, status=400)
+        # a stale or mangled link to the page itself: start from the first titles
+        contents, next_cursor = facets.browse(selection, None) if selection else catalog.page(snapshot, None)
+
+    # Generate signed URLs for HLS videos (the whole page in one pass) and group by category for section display
+    hls_contents = [content for content in contents if content.video_url and content.video_url.endswith('.m3u8')]
+    signed_urls = sign_many([(content.pk, request.build_absolute_uri(content.video_url)) for content in hls_contents])
+    for content, url in zip(hls_contents, signed_urls):
+        content.signed_url = url
 
-    # Group by category for section display
     categorized_contents = defaultdict(list)
     for content in contents:
+        if not hasattr(content, 'signed_url'):
+            content.signed_url = content.video_file.url if content.video_file else ""
         categorized_contents[content.get_category_display()].append(content)
 
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'sections': [
+                {'category': category, 'html': render_to_string('streaming/content_cards.html', {'items': items}, request)}
+                for category, items in categorized_contents.items()
+            ],
+            'next': next_cursor,
+        })
+
+    # Filter options with their counts, in the order the viewer's country ranks them
+    filter_options = facets.options(facets.counts(selection), {
+        'category': snapshot.categories, 'genre': snapshot.genres, 'language': snapshot.languages,
+    })
+
     context = {
         "contents": contents,
-        "categories": categories,
-        "genres": genres,
-        "languages": languages,
+        "categories": filter_options['category'],
+        "genres": filter_options['genre'],
+        "languages": filter_options['language'],
+        "selection": selection,
         "categorized_contents": dict(categorized_contents),
+        "next_cursor": next_cursor,
     }
 
     return render(request, "streaming/streaming_home.html", context)
+
+
+@login_required
+def browse_catalog(request):
+    # the faceted browse API: ?category=&genre=&language=&cursor= -> a page of titles plus the facet counts
+    selection = facets.selected(request.GET)
+    try:
+        contents, next_cursor = facets.browse(selection, request.GET.get('cursor'))
+    except BadCursor:
+        return JsonResponse({'error': 'bad_cursor'}, status=400)
+    return JsonResponse({
+        'selection': selection,
+        'results': [
+            {
+                'id': content.id,
+                'title': content.title,
+                'category': content.category,
+                'genre': content.genre,
+                'language': content.language,
+                'release_date': content.release_date,
+                'thumbnail': content.thumbnail.url if content.thumbnail else None,
+                'url': reverse('streaming:watch_video', args=[content.id]),
+            }
+            for content in contents
+        ],
+        'facets': {
+            facet: [{'value': value, 'label': label, 'count': count} for value, label, count in values]
+            for facet, values in facets.options(facets.counts(selection)).items()
+        },
+        'next': next_cursor,
+    })
 # ------------------- Watch Video -------------------
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
@@ -439,6 +450,8 @@ def report_watch_time(request, content_id):
     if event == 'start':
         StreamViewLog.objects.filter(pk=log.pk).update(views=F('views') + 1)
         StreamingContent.objects.filter(pk=content.pk).update(total_plays=F('total_plays') + 1)
+        if log.country:
+            catalog.schedule_refresh(str(log.country))  # re-rank that country's catalog soon
 
     seconds_to_add = 0
     if isinstance(delta, (int, float)) and delta >= 0:
@@ -696,3 +709,42 @@ def serve_hls_key(request, key_filename):
     response = HttpResponse(key_data, content_type='application/octet-stream')
     response['Content-Disposition'] = f'inline; filename="{key_filename}"'
     return response
+
+
+# ------------------- HLS Delivery -------------------
+from django.core.cache import cache
+from django.http import HttpResponseForbidden
+from . import hls
+from .utils import validate_signed_url
+
+
+def has_active_subscription(user):
+    # asked for every playlist and segment, so the answer is cached for a minute per user
+    key = f'hls:subscription:{user.pk}'
+    active = cache.get(key)
+    if active is None:
+        active = StreamingSubscription.objects.filter(
+            user=user, is_paid=True, access_expires_at__gt=timezone.now()
+        ).exists()
+        cache.set(key, active, 60)
+    return active
+
+
+def serve_hls(request, path):
+    # /media/hls/<content id>/<file>?video_id=&expires=&signature= , see streaming/hls.py
+    content_id, _slash, file_path = path.partition('/')
+    if not content_id.isdigit():
+        raise Http404("Not found")  # e.g. hls/keys/, which only serve_hls_key hands out
+
+    video_id = request.GET.get('video_id', '')
+    expires = request.GET.get('expires', '')
+    signature = request.GET.get('signature', '')
+    if video_id != content_id or not validate_signed_url(video_id, expires, signature):
+        return HttpResponseForbidden("Invalid or expired link")
+    if not request.user.is_authenticated or not has_active_subscription(request.user):
+        return HttpResponseForbidden("An active subscription is required")
+
+    full_path = hls.resolve(content_id, file_path)
+    if full_path is None:
+        raise Http404("Not found")
+    return hls.serve_file(request, content_id, full_path, int(expires))